@@ -8,18 +8,24 @@ Output Flow: Agent writes to outbox/ -> Bot sends to Discord
 """
 
 import asyncio
+import io
+import json
+import logging
 import os
-import time
 import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import pyautogui
 import pyperclip
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import PatternMatchingEventHandler
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -33,23 +39,94 @@ IDE_WINDOW_TITLE = os.getenv("IDE_WINDOW_TITLE", "AntiGravity")
 OUTBOX_PATH = Path(os.getenv("OUTBOX_PATH", "./outbox"))
 PASTE_DELAY = float(os.getenv("PASTE_DELAY_SECONDS", "0.5"))
 
+# pyautogui sleeps 0.1s after every call by default. All GUI sequences
+# here wait explicitly where the IDE needs time, so drop the hidden pause.
+# FAILSAFE stays on: slamming the mouse into a corner still aborts.
+pyautogui.PAUSE = 0
+pyautogui.MINIMUM_DURATION = 0
+
 # Ensure outbox exists
 OUTBOX_PATH.mkdir(parents=True, exist_ok=True)
 
+# Scratch files (recordings) live outside the watched outbox so the
+# watcher never picks up the bot's own output
+TMP_PATH = Path(tempfile.gettempdir()) / "antigravity_tmp"
+TMP_PATH.mkdir(parents=True, exist_ok=True)
+
+
+def setup_logging():
+    """
+    Print messages from the utils modules' loggers (e.g. windows_control)
+    in the same [LEVEL] format as the bot's own output. Safe to call twice.
+    """
+    utils_logger = logging.getLogger("utils")
+    if not utils_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        utils_logger.addHandler(handler)
+        utils_logger.setLevel(logging.INFO)
+        utils_logger.propagate = False
+
+
 # Discord Bot Setup
 intents = discord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents)
+bot._outbox_channel = None  # Resolved in on_ready
+
+
+# Blocking GUI/IO work runs here so the event loop keeps serving Discord.
+# A single worker keeps pyautogui input synthesis serialized.
+_GUI_EXEC = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gui")
+
+
+async def _gui(fn, *args, **kwargs):
+    """Run a blocking GUI function on the GUI thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_GUI_EXEC, lambda: fn(*args, **kwargs))
 
 
 # ----- GUI Automation with Visual Anchoring -----
 ANCHORS_PATH = Path(__file__).parent / "anchors"
 CHAT_INPUT_ANCHOR = ANCHORS_PATH / "chat_input.png"
 SEND_BUTTON_ANCHOR = ANCHORS_PATH / "send_button.png"
+MODEL_SELECTOR_ANCHOR = ANCHORS_PATH / "model_selector.png"
 
 # Ensure anchors directory exists
 ANCHORS_PATH.mkdir(parents=True, exist_ok=True)
 
+# Decode anchor templates once at startup instead of on every lookup
+from utils.anchor_match import grab_gray, grab_png, grab_region, load_anchor, locate as locate_anchor, locate_many, save_anchor
+
+for _anchor in (CHAT_INPUT_ANCHOR, SEND_BUTTON_ANCHOR, MODEL_SELECTOR_ANCHOR):
+    load_anchor(_anchor)
+
+
+def _wait_until(predicate, timeout: float, interval: float = 0.02) -> bool:
+    """
+    Poll predicate until it returns True or timeout (seconds) elapses.
+    Returns whether the condition was met.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if predicate():
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+# zlib level 3 encodes several times faster than the default 6 for screenshots
+PNG_COMPRESSION = 3
+
+
+def capture_png() -> bytes:
+    """Grab the full screen via mss and encode it as PNG in memory."""
+    return grab_png(PNG_COMPRESSION)
+
 
 def find_and_focus_ide_window() -> bool:
     """
@@ -62,7 +139,7 @@ def find_and_focus_ide_window() -> bool:
         if windows:
             win = windows[0]
             win.activate()
-            time.sleep(0.3)  # Give it time to focus
+            _wait_until(lambda: win.isActive, 0.5)  # Give it time to focus
             return True
         else:
             print(f"[WARN] Could not find window with title: {IDE_WINDOW_TITLE}")
@@ -85,11 +162,7 @@ def locate_chat_input() -> tuple:
     try:
         # Search for the anchor image on screen
         # confidence=0.8 allows for slight visual differences
-        location = pyautogui.locateOnScreen(
-            str(CHAT_INPUT_ANCHOR), 
-            confidence=0.8,
-            grayscale=True  # More robust to color changes
-        )
+        location = locate_anchor(CHAT_INPUT_ANCHOR, confidence=0.8)
         
         if location:
             # Get center of the found region
@@ -131,18 +204,25 @@ def paste_to_ide(text: str) -> bool:
         return False
 
     try:
-        # Try to locate and click on chat input using visual anchor
-        if CHAT_INPUT_ANCHOR.exists():
-            if not click_chat_input():
-                print("[WARN] Visual anchor failed, falling back to blind paste")
+        # Locate chat input and send button from a single screen grab
+        found = locate_many({CHAT_INPUT_ANCHOR: 0.8, SEND_BUTTON_ANCHOR: 0.7})
+        chat_box = found[CHAT_INPUT_ANCHOR]
+        send_box = found[SEND_BUTTON_ANCHOR]
+        
+        # Click on chat input using visual anchor (or fall back to blind mode)
+        if chat_box:
+            chat_center = pyautogui.center(chat_box)
+            print(f"[INFO] Found chat input at ({chat_center.x}, {chat_center.y})")
+            pyautogui.click(chat_center.x, chat_center.y)
+            time.sleep(0.2)
+        elif CHAT_INPUT_ANCHOR.exists():
+            print("[WARN] Visual anchor failed, falling back to blind paste")
         else:
             print("[INFO] No anchor image, using blind paste mode")
         
-        time.sleep(PASTE_DELAY)
-        
-        # Copy text to clipboard
+        # Copy text to clipboard and wait until it's actually there
         pyperclip.copy(text)
-        time.sleep(PASTE_DELAY)
+        _wait_until(lambda: pyperclip.paste() == text, PASTE_DELAY)
 
         # Paste (Ctrl+V)
         pyautogui.hotkey("ctrl", "v")
@@ -156,13 +236,11 @@ def paste_to_ide(text: str) -> bool:
         # Option 1: Click the send button if calibrated
         if SEND_BUTTON_ANCHOR.exists():
             try:
-                location = pyautogui.locateOnScreen(
-                    str(SEND_BUTTON_ANCHOR),
-                    confidence=0.7,
-                    grayscale=True
-                )
-                if location:
-                    center = pyautogui.center(location)
+                # Not visible before the paste? Look once more now there's text
+                if send_box is None:
+                    send_box = locate_anchor(SEND_BUTTON_ANCHOR, confidence=0.7)
+                if send_box:
+                    center = pyautogui.center(send_box)
                     pyautogui.click(center.x, center.y)
                     submitted = True
                     print("[INFO] Clicked send button")
@@ -172,9 +250,9 @@ def paste_to_ide(text: str) -> bool:
         # Option 2: Fall back to Enter key
         if not submitted:
             # Re-click chat input to ensure focus
-            if CHAT_INPUT_ANCHOR.exists():
-                click_chat_input()
-                time.sleep(0.2)
+            if chat_box:
+                pyautogui.click(chat_center.x, chat_center.y)
+                time.sleep(0.4)
             
             pyautogui.press("enter")
             time.sleep(0.1)
@@ -234,8 +312,8 @@ Instructions:
         return
     
     # Capture the region
-    screenshot = pyautogui.screenshot(region=(left, top, width, height))
-    screenshot.save(str(CHAT_INPUT_ANCHOR))
+    screenshot = grab_region(left, top, width, height)
+    save_anchor(screenshot, CHAT_INPUT_ANCHOR)
     
     print(f"\n✅ Anchor saved to: {CHAT_INPUT_ANCHOR}")
     print(f"   Region: {width}x{height} pixels")
@@ -250,27 +328,26 @@ async def transcribe_voice_message(attachment: discord.Attachment) -> str:
     """
     try:
         import speech_recognition as sr
-        from pydub import AudioSegment
 
-        # Download the voice file
-        with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as tmp_ogg:
-            await attachment.save(tmp_ogg.name)
-            tmp_ogg_path = tmp_ogg.name
+        # Download the voice message into memory
+        ogg_bytes = await attachment.read()
 
-        # Convert to WAV for SpeechRecognition
-        tmp_wav_path = tmp_ogg_path.replace(".ogg", ".wav")
-        audio = AudioSegment.from_ogg(tmp_ogg_path)
-        audio.export(tmp_wav_path, format="wav")
+        # Decode straight to 16 kHz mono PCM through ffmpeg's pipes (no temp files)
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-i", "pipe:0",
+            "-f", "s16le", "-ar", "16000", "-ac", "1", "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        pcm_bytes, _ = await proc.communicate(ogg_bytes)
+        if proc.returncode != 0 or not pcm_bytes:
+            return "[Transcription Error: ffmpeg could not decode the audio]"
 
-        # Transcribe
+        # Transcribe off the event loop (recognize_google is a blocking HTTP call)
         recognizer = sr.Recognizer()
-        with sr.AudioFile(tmp_wav_path) as source:
-            audio_data = recognizer.record(source)
-            text = recognizer.recognize_google(audio_data)
-
-        # Cleanup
-        os.unlink(tmp_ogg_path)
-        os.unlink(tmp_wav_path)
+        audio_data = sr.AudioData(pcm_bytes, 16000, 2)
+        text = await asyncio.to_thread(recognizer.recognize_google, audio_data)
 
         return text
     except Exception as e:
@@ -278,119 +355,285 @@ async def transcribe_voice_message(attachment: discord.Attachment) -> str:
 
 
 # ----- Outbox Watcher -----
-class OutboxHandler(FileSystemEventHandler):
+# Discord allows at most 10 attachments per message, within the upload size limit
+MAX_FILES_PER_MESSAGE = 10
+MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+
+
+class OutboxHandler(PatternMatchingEventHandler):
     """Watches the outbox directory for new files and queues them for Discord."""
 
+    # Archived and temporary files are filtered out by watchdog itself
+    IGNORE_PATTERNS = ["*.sent_*", "*.tmp"]
+    MAX_SEEN_FILES = 1024
+    QUEUE_SIZE = 256
+    BATCH_WINDOW = 0.1  # Seconds to wait for more files before sending
+    SETTLE_TIME = 0.25  # A file with no events for this long is fully written
+
     def __init__(self, bot_instance, channel_id):
-        super().__init__()
+        super().__init__(ignore_patterns=self.IGNORE_PATTERNS, ignore_directories=True)
         self.bot = bot_instance
         self.channel_id = channel_id
-        self.processed_files = set()
+        self._seen = OrderedDict()  # Bounded record of recently queued paths
+        self._last_event = {}  # Pending path -> time of its latest write event
+        self._closed = set()  # Pending paths the writer has closed
+        self.queue = None  # Created on the bot loop by start()
+        self._consumer = None
+
+    def start(self):
+        """Create the queue and its consumer task. Must run on the bot loop."""
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
 
     def on_created(self, event):
-        if event.is_directory:
-            return
-
-        file_path = Path(event.src_path)
-
         # Avoid processing the same file twice
-        if str(file_path) in self.processed_files:
+        if event.src_path in self._seen:
             return
-        self.processed_files.add(str(file_path))
+        self._seen[event.src_path] = None
+        if len(self._seen) > self.MAX_SEEN_FILES:
+            self._seen.popitem(last=False)
+        self._last_event[event.src_path] = time.monotonic()
 
-        # Schedule the async send
+        # Hand the path to the single consumer on the bot loop
         asyncio.run_coroutine_threadsafe(
-            self.send_file_to_discord(file_path),
+            self._enqueue(Path(event.src_path)),
             self.bot.loop
         )
 
-    async def send_file_to_discord(self, file_path: Path):
-        """Reads the file and sends its content to Discord."""
+    def on_modified(self, event):
+        # Further writes to a pending file push its send back
+        if event.src_path in self._last_event:
+            self._last_event[event.src_path] = time.monotonic()
+
+    def on_closed(self, event):
+        # Close-after-write (inotify only) means the file is complete
+        if event.src_path in self._last_event:
+            self._closed.add(event.src_path)
+
+    async def _wait_until_written(self, file_paths: list):
+        """Wait until each file is closed or has had no write events for SETTLE_TIME."""
+        while True:
+            now = time.monotonic()
+            waits = [
+                self._last_event.get(str(path), 0) + self.SETTLE_TIME - now
+                for path in file_paths if str(path) not in self._closed
+            ]
+            remaining = max(waits, default=0)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+
+        for path in file_paths:
+            self._last_event.pop(str(path), None)
+            self._closed.discard(str(path))
+
+    async def _enqueue(self, file_path: Path):
+        self.start()
+        await self.queue.put(file_path)
+
+    async def _consume(self):
+        """Drain the queue, sending files that arrive close together as one message."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.BATCH_WINDOW
+            while len(batch) < MAX_FILES_PER_MESSAGE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.send_files_to_discord(batch)
+
+    async def send_files_to_discord(self, file_paths: list):
+        """Reads the files and sends their content to Discord."""
         try:
-            # Wait a moment to ensure the file is fully written
-            await asyncio.sleep(1)
-            
-            # Skip already-sent files and temp files
-            if ".sent_" in str(file_path) or file_path.suffix.startswith(".sent"):
-                return
-            
-            # Check if file still exists (might have been moved/deleted)
-            if not file_path.exists():
-                return
+            # Make sure the writer has finished with every file
+            await self._wait_until_written(file_paths)
 
-            channel = self.bot.get_channel(self.channel_id)
+            channel = getattr(self.bot, "_outbox_channel", None) or self.bot.get_channel(self.channel_id)
             if not channel:
                 print(f"[ERROR] Could not find channel {self.channel_id}")
                 return
 
-            # Check file extension to determine how to send
-            image_extensions = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
-            
-            if file_path.suffix.lower() in image_extensions:
-                # Send image files directly as attachments
-                await channel.send(
-                    f"📷 **Image from Agent:**",
-                    file=discord.File(file_path)
-                )
-            else:
-                # Read text file content
+            attachments = []  # (label, name, data)
+            sent = []
+            for file_path in file_paths:
+                # Check if file still exists (might have been moved/deleted)
+                if not file_path.exists():
+                    continue
+
+                # Read the file once; attachments are built from the same bytes
+                data = file_path.read_bytes()
+                sent.append(file_path)
+
+                # Check file extension to determine how to send
+                if file_path.suffix.lower() in IMAGE_EXTENSIONS:
+                    attachments.append(("📷 **Image from Agent:**", file_path.name, data))
+                    continue
+
+                # Decode text file content
                 try:
-                    content = file_path.read_text(encoding="utf-8")
+                    content = data.decode("utf-8")
                 except UnicodeDecodeError:
                     # Binary file - send as attachment
-                    await channel.send(
-                        f"📎 **File from Agent:** `{file_path.name}`",
-                        file=discord.File(file_path)
-                    )
-                    content = None
-                
-                if content:
-                    # Handle large messages
-                    if len(content) > 1900:
-                        await channel.send(
-                            f"📄 **Agent Response** (from `{file_path.name}`):",
-                            file=discord.File(file_path)
-                        )
-                    else:
-                        await channel.send(f"🤖 **Agent Response:**\n```\n{content}\n```")
-
-            # Archive the file (rename instead of delete)
-            try:
-                archive_path = file_path.with_suffix(f".sent_{datetime.now().strftime('%H%M%S')}")
-                file_path.rename(archive_path)
-                print(f"[INFO] Sent and archived: {file_path.name}")
-            except FileNotFoundError:
-                # File was already moved/deleted - that's OK
-                pass
+                    attachments.append((f"📎 **File from Agent:** `{file_path.name}`", file_path.name, data))
+                    continue
+
+                if not content:
+                    continue
+
+                # Handle large messages
+                if len(content) > 1900:
+                    attachments.append((f"📄 **Agent Response** (from `{file_path.name}`):", file_path.name, data))
+                else:
+                    await channel.send(f"🤖 **Agent Response:**\n```\n{content}\n```")
+
+            # Pack attachments into as few messages as the upload limits allow
+            group, group_bytes = [], 0
+            for item in attachments:
+                if group and group_bytes + len(item[2]) > MAX_UPLOAD_BYTES:
+                    await self._send_attachments(channel, group)
+                    group, group_bytes = [], 0
+                group.append(item)
+                group_bytes += len(item[2])
+            if group:
+                await self._send_attachments(channel, group)
+
+            # Archive the files (rename instead of delete)
+            for file_path in sent:
+                try:
+                    archive_path = file_path.with_suffix(f".sent_{datetime.now().strftime('%H%M%S')}")
+                    file_path.rename(archive_path)
+                    print(f"[INFO] Sent and archived: {file_path.name}")
+                except FileNotFoundError:
+                    # File was already moved/deleted - that's OK
+                    pass
 
         except Exception as e:
             print(f"[ERROR] Failed to send file to Discord: {e}")
 
+    async def _send_attachments(self, channel, group: list):
+        """Send (label, name, data) attachments as a single message."""
+        if len(group) == 1:
+            label = group[0][0]
+        else:
+            names = ", ".join(f"`{name}`" for _, name, _ in group)
+            label = f"📎 **Files from Agent:** {names}"
+        files = [discord.File(io.BytesIO(data), filename=name) for _, name, data in group]
+        await channel.send(label, files=files)
+
 
 # Global observer instance
 observer = None
 
+# Filesystems where inotify/ReadDirectoryChangesW events can't be trusted
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smbfs", "fuse.sshfs", "9p"}
+
+
+def create_outbox_observer():
+    """
+    Create the watchdog observer for the outbox.
+    Uses the native event-driven observer, switching to a slow
+    PollingObserver only when the outbox sits on a network filesystem
+    (where native events are silently dropped).
+    """
+    try:
+        import psutil
+        
+        outbox = str(OUTBOX_PATH.resolve())
+        fstype, remote, best = "", False, ""
+        for part in psutil.disk_partitions(all=True):
+            mount = part.mountpoint
+            if outbox.startswith(mount) and len(mount) > len(best):
+                best, fstype = mount, part.fstype.lower()
+                remote = "remote" in part.opts
+    except Exception:
+        fstype, remote = "", False
+    
+    if fstype in NETWORK_FILESYSTEMS or remote:
+        from watchdog.observers.polling import PollingObserver
+        print(f"[INFO] Outbox is on a network filesystem ({fstype or 'remote'}), polling every 30s")
+        return PollingObserver(timeout=30)
+    
+    return Observer()
+
 
 # ----- Discord Events -----
+async def resolve_outbox_channel():
+    """Look up the configured channel and cache it on bot._outbox_channel."""
+    bot._outbox_channel = bot.get_channel(DISCORD_CHANNEL_ID)
+    if bot._outbox_channel is None:
+        try:
+            bot._outbox_channel = await bot.fetch_channel(DISCORD_CHANNEL_ID)
+        except discord.DiscordException as e:
+            print(f"[ERROR] Could not find channel {DISCORD_CHANNEL_ID}: {e}")
+
+
+def get_outbox_channel():
+    """Return the cached channel, looking it up if the cache was dropped."""
+    return bot._outbox_channel or bot.get_channel(DISCORD_CHANNEL_ID)
+
+
+@bot.event
+async def on_disconnect():
+    # The cached channel object may be stale after the gateway reconnects
+    bot._outbox_channel = None
+
+
+@bot.event
+async def on_resumed():
+    # A resumed session doesn't fire on_ready, so re-resolve here
+    await resolve_outbox_channel()
+
+
 @bot.event
 async def on_ready():
-    global observer, approval_watcher
+    global observer, approval_watcher, approval_hook, _approval_thread
     print(f"[INFO] Bot connected as {bot.user}")
     print(f"[INFO] Listening for messages in channel ID: {DISCORD_CHANNEL_ID}")
     print(f"[INFO] Watching outbox: {OUTBOX_PATH}")
 
-    # Start the file watcher
-    handler = OutboxHandler(bot, DISCORD_CHANNEL_ID)
-    observer = Observer()
-    observer.schedule(handler, str(OUTBOX_PATH), recursive=False)
-    observer.start()
-    print("[INFO] Outbox watcher started.")
+    # Resolve the target channel once; every sender reuses it
+    await resolve_outbox_channel()
+
+    # Start the file watcher (once; on_ready fires again after a reconnect)
+    if observer is None:
+        handler = OutboxHandler(bot, DISCORD_CHANNEL_ID)
+        observer = create_outbox_observer()
+        handler.start()
+        observer.schedule(handler, str(OUTBOX_PATH), recursive=False)
+        observer.start()
+        print("[INFO] Outbox watcher started.")
+    
+    # Probe for a hardware video encoder now rather than on the first !record
+    bot.loop.run_in_executor(None, detect_encoder)
     
-    # Initialize command approval watcher
+    # Initialize command approval watcher (once, like the outbox watcher,
+    # so a reconnect keeps pending-dialog state and a single event hook)
     try:
-        from utils.command_approval import CommandApprovalWatcher
-        approval_watcher = CommandApprovalWatcher(bot, DISCORD_CHANNEL_ID)
-        check_for_approval_dialogs.start()
+        from utils.command_approval import CommandApprovalWatcher, WindowOpenedHook
+        if approval_watcher is None:
+            approval_watcher = CommandApprovalWatcher(bot, DISCORD_CHANNEL_ID,
+                                                      gui_executor=_GUI_EXEC)
+        
+        # Check on window-open events as well as polling
+        if approval_hook is None:
+            approval_hook = WindowOpenedHook(request_approval_check)
+            if approval_hook.start():
+                print("[INFO] Approval checks triggered by UI Automation window events.")
+        
+        if _approval_thread is None or not _approval_thread.is_alive():
+            _approval_thread = threading.Thread(
+                target=approval_poll_loop, name="approval-poll", daemon=True
+            )
+            _approval_thread.start()
         print("[INFO] Command approval watcher started.")
     except Exception as e:
         print(f"[WARN] Could not start approval watcher: {e}")
@@ -427,15 +670,18 @@ async def on_message(message: discord.Message):
 
     # Paste to IDE
     if text_to_paste.strip():
-        success = paste_to_ide(text_to_paste.strip())
+        success = await _gui(paste_to_ide, text_to_paste.strip())
         if success:
             await message.add_reaction("✅")
             
+            # The agent is about to work: poll for approval dialogs quickly
+            note_approval_activity()
+            
             # Start auto-recording if enabled
             if auto_recording_enabled:
                 global auto_recorder
                 try:
-                    auto_recorder = get_auto_recorder(OUTBOX_PATH)
+                    auto_recorder = get_auto_recorder(TMP_PATH)
                     auto_recorder.on_complete = on_auto_recording_complete
                     auto_recorder.start()
                     await message.channel.send("🔴 Recording response...")
@@ -466,18 +712,12 @@ async def screenshot_command(ctx):
     try:
         await ctx.send("📸 Taking screenshot...")
         
-        # Take screenshot
-        screenshot = pyautogui.screenshot()
-        
-        # Save to temp file
-        screenshot_path = OUTBOX_PATH / f"screenshot_{datetime.now().strftime('%H%M%S')}.png"
-        screenshot.save(str(screenshot_path))
+        # Take screenshot (encoded in memory, never touches disk)
+        png = await _gui(capture_png)
+        filename = f"screenshot_{datetime.now().strftime('%H%M%S')}.png"
         
         # Send to Discord
-        await ctx.send("🖥️ Current desktop:", file=discord.File(screenshot_path))
-        
-        # Clean up
-        screenshot_path.unlink()
+        await ctx.send("🖥️ Current desktop:", file=discord.File(io.BytesIO(png), filename=filename))
         
     except Exception as e:
         await ctx.send(f"❌ Screenshot failed: {e}")
@@ -486,6 +726,7 @@ async def screenshot_command(ctx):
 # ----- Screen Recording -----
 from utils.screen_recorder import get_recorder, ScreenRecorder
 from utils.auto_recorder import get_auto_recorder, AutoRecorder
+from utils.video_encoder import detect_encoder
 
 # Global recorders
 screen_recorder: ScreenRecorder = None
@@ -506,19 +747,22 @@ async def record_command(ctx, duration: int = 30):
             await ctx.send("⚠️ Already recording! Use `!stoprecord` to stop.")
             return
         
-        screen_recorder = get_recorder(OUTBOX_PATH)
+        screen_recorder = get_recorder(TMP_PATH)
         
         await ctx.send(f"🔴 Recording started for {duration}s... (right half of screen)")
         
         output_path = screen_recorder.start_recording(duration=duration, region="right")
         
-        # Wait for recording to finish
-        await asyncio.sleep(duration + 1)
+        # Wait for the worker to finish writing the file
+        await asyncio.to_thread(screen_recorder.wait)
+        
+        # Stopped early: !stoprecord sends the file
+        if screen_recorder.stop_requested:
+            return
         
         # Recording auto-stopped, send the file
         if output_path and output_path.exists():
             await ctx.send("📹 Recording complete:", file=discord.File(output_path))
-            await asyncio.sleep(1)
             try:
                 output_path.unlink()
             except Exception:
@@ -543,11 +787,10 @@ async def stoprecord_command(ctx):
         await ctx.send("⏹️ Stopping recording...")
         
         output_path = screen_recorder.stop_recording()
-        await asyncio.sleep(1)
+        await asyncio.to_thread(screen_recorder.wait)
         
         if output_path and output_path.exists():
             await ctx.send("📹 Recording:", file=discord.File(output_path))
-            await asyncio.sleep(1)
             try:
                 output_path.unlink()
             except Exception:
@@ -568,7 +811,7 @@ async def send_pending_video():
     global pending_video_path
     
     if pending_video_path and pending_video_path.exists():
-        channel = bot.get_channel(DISCORD_CHANNEL_ID)
+        channel = get_outbox_channel()
         if channel:
             await channel.send("📹 **Response Recording:**", file=discord.File(pending_video_path))
             await asyncio.sleep(1)
@@ -611,6 +854,67 @@ async def autorecord_command(ctx, state: str = None):
         await ctx.send("Usage: `!autorecord on` or `!autorecord off`")
 
 
+def capture_chat_pages(pages: int) -> list:
+    """
+    Scroll up through the chat, capturing one PNG screenshot per page.
+    Blocking; returns (filename, png_bytes) pairs, newest page first.
+    """
+    time.sleep(0.5)
+    
+    # Click on chat area (using anchor)
+    chat_x, chat_y = None, None
+    if CHAT_INPUT_ANCHOR.exists():
+        location = locate_anchor(CHAT_INPUT_ANCHOR, confidence=0.7)
+        if location:
+            center = pyautogui.center(location)
+            chat_x, chat_y = center.x, center.y - 200
+            pyautogui.click(chat_x, chat_y)
+            time.sleep(0.3)
+    
+    # Scroll to bottom first using mouse wheel
+    if chat_x and chat_y:
+        pyautogui.moveTo(chat_x, chat_y)
+        pyautogui.scroll(-20)  # Scroll down to bottom
+        time.sleep(0.5)
+    
+    screenshots = []
+    timestamp = datetime.now().strftime('%H%M%S')
+    
+    for i in range(pages):
+        # Take screenshot
+        screenshots.append((f"fullshot_{timestamp}_{i}.png", capture_png()))
+        
+        if i < pages - 1:
+            # Scroll up using mouse wheel (more reliable than pageup)
+            if chat_x and chat_y:
+                pyautogui.moveTo(chat_x, chat_y)
+                pyautogui.scroll(10)  # Scroll up
+            time.sleep(0.6)
+    
+    return screenshots
+
+
+def scroll_chat(direction: str, amount: int):
+    """Click into the chat area and page it up or down (blocking)."""
+    time.sleep(0.3)
+    
+    # Click on chat area
+    if CHAT_INPUT_ANCHOR.exists():
+        location = locate_anchor(CHAT_INPUT_ANCHOR, confidence=0.7)
+        if location:
+            center = pyautogui.center(location)
+            pyautogui.click(center.x, center.y - 200)
+            time.sleep(0.2)
+    
+    # Scroll
+    key = "pageup" if direction.lower() == "up" else "pagedown"
+    for _ in range(amount):
+        pyautogui.press(key)
+        time.sleep(0.2)
+    
+    time.sleep(0.3)
+
+
 @bot.command(name="fullshot")
 async def fullshot_command(ctx, pages: int = 3):
     """
@@ -621,64 +925,28 @@ async def fullshot_command(ctx, pages: int = 3):
         await ctx.send(f"📸 Capturing {pages} pages of chat...")
         
         # Focus IDE window first
-        if not find_and_focus_ide_window():
+        if not await _gui(find_and_focus_ide_window):
             await ctx.send("❌ IDE window not found")
             return
         
-        time.sleep(0.5)
-        
-        # Click on chat area (using anchor)
-        chat_x, chat_y = None, None
-        if CHAT_INPUT_ANCHOR.exists():
-            location = pyautogui.locateOnScreen(
-                str(CHAT_INPUT_ANCHOR), confidence=0.7, grayscale=True
-            )
-            if location:
-                center = pyautogui.center(location)
-                chat_x, chat_y = center.x, center.y - 200
-                pyautogui.click(chat_x, chat_y)
-                time.sleep(0.3)
-        
-        # Scroll to bottom first using mouse wheel
-        if chat_x and chat_y:
-            pyautogui.moveTo(chat_x, chat_y)
-            pyautogui.scroll(-20)  # Scroll down to bottom
-            time.sleep(0.5)
-        
-        screenshots = []
-        timestamp = datetime.now().strftime('%H%M%S')
-        
-        for i in range(pages):
-            # Take screenshot
-            screenshot = pyautogui.screenshot()
-            screenshot_path = OUTBOX_PATH / f"fullshot_{timestamp}_{i}.png"
-            screenshot.save(str(screenshot_path))
-            screenshots.append(screenshot_path)
-            
-            if i < pages - 1:
-                # Scroll up using mouse wheel (more reliable than pageup)
-                if chat_x and chat_y:
-                    pyautogui.moveTo(chat_x, chat_y)
-                    pyautogui.scroll(10)  # Scroll up
-                time.sleep(0.6)
+        screenshots = await _gui(capture_chat_pages, pages)
         
         # Send all screenshots (oldest first for reading order)
         screenshots.reverse()
         
-        for i, path in enumerate(screenshots):
+        total_bytes = sum(len(png) for _, png in screenshots)
+        if len(screenshots) <= MAX_FILES_PER_MESSAGE and total_bytes <= MAX_UPLOAD_BYTES:
+            # All pages as attachments on a single message
             await ctx.send(
-                f"📄 Page {i+1}/{pages}:",
-                file=discord.File(path)
+                f"📄 Full chat ({pages} pages):",
+                files=[discord.File(io.BytesIO(png), filename=name) for name, png in screenshots]
             )
-            await asyncio.sleep(0.5)  # Wait for Discord to finish with file
-        
-        # Clean up files after all sent
-        await asyncio.sleep(1)
-        for path in screenshots:
-            try:
-                path.unlink()
-            except Exception:
-                pass  # Ignore cleanup errors
+        else:
+            # Too much for one message: upload the pages concurrently
+            await asyncio.gather(*[
+                ctx.send(f"📄 Page {i+1}/{pages}:", file=discord.File(io.BytesIO(png), filename=name))
+                for i, (name, png) in enumerate(screenshots)
+            ])
         
         await ctx.send("✅ Full chat captured!")
         
@@ -693,40 +961,20 @@ async def scroll_command(ctx, direction: str = "up", amount: int = 3):
     Usage: !scroll up 5 or !scroll down 2
     """
     try:
-        if not find_and_focus_ide_window():
+        if not await _gui(find_and_focus_ide_window):
             await ctx.send("❌ IDE window not found")
             return
         
-        time.sleep(0.3)
-        
-        # Click on chat area
-        if CHAT_INPUT_ANCHOR.exists():
-            location = pyautogui.locateOnScreen(
-                str(CHAT_INPUT_ANCHOR), confidence=0.7, grayscale=True
-            )
-            if location:
-                center = pyautogui.center(location)
-                pyautogui.click(center.x, center.y - 200)
-                time.sleep(0.2)
-        
-        # Scroll
-        key = "pageup" if direction.lower() == "up" else "pagedown"
-        for _ in range(amount):
-            pyautogui.press(key)
-            time.sleep(0.2)
-        
-        time.sleep(0.3)
+        await _gui(scroll_chat, direction, amount)
         
         # Screenshot
-        screenshot = pyautogui.screenshot()
-        screenshot_path = OUTBOX_PATH / f"scroll_{datetime.now().strftime('%H%M%S')}.png"
-        screenshot.save(str(screenshot_path))
+        png = await _gui(capture_png)
+        filename = f"scroll_{datetime.now().strftime('%H%M%S')}.png"
         
         await ctx.send(
             f"📸 After scrolling {direction} {amount}x:",
-            file=discord.File(screenshot_path)
+            file=discord.File(io.BytesIO(png), filename=filename)
         )
-        screenshot_path.unlink()
         
     except Exception as e:
         await ctx.send(f"❌ Scroll failed: {e}")
@@ -742,7 +990,7 @@ from utils.windows_control import (
 @bot.command(name="max")
 async def max_command(ctx, *, window_title: str = "AntiGravity"):
     """Maximize a window by title."""
-    if maximize_window(window_title):
+    if await _gui(maximize_window, window_title):
         await ctx.send(f"✅ Maximized: `{window_title}`")
     else:
         await ctx.send(f"❌ Window not found: `{window_title}`")
@@ -751,7 +999,7 @@ async def max_command(ctx, *, window_title: str = "AntiGravity"):
 @bot.command(name="min")
 async def min_command(ctx, *, window_title: str = "AntiGravity"):
     """Minimize a window by title."""
-    if minimize_window(window_title):
+    if await _gui(minimize_window, window_title):
         await ctx.send(f"✅ Minimized: `{window_title}`")
     else:
         await ctx.send(f"❌ Window not found: `{window_title}`")
@@ -760,7 +1008,7 @@ async def min_command(ctx, *, window_title: str = "AntiGravity"):
 @bot.command(name="focus")
 async def focus_command(ctx, *, window_title: str = "AntiGravity"):
     """Bring a window to the foreground."""
-    if focus_window(window_title):
+    if await _gui(focus_window, window_title):
         await ctx.send(f"✅ Focused: `{window_title}`")
     else:
         await ctx.send(f"❌ Window not found: `{window_title}`")
@@ -769,7 +1017,7 @@ async def focus_command(ctx, *, window_title: str = "AntiGravity"):
 @bot.command(name="restore")
 async def restore_command(ctx, *, window_title: str = "AntiGravity"):
     """Restore a minimized window."""
-    if restore_window(window_title):
+    if await _gui(restore_window, window_title):
         await ctx.send(f"✅ Restored: `{window_title}`")
     else:
         await ctx.send(f"❌ Window not found: `{window_title}`")
@@ -778,7 +1026,7 @@ async def restore_command(ctx, *, window_title: str = "AntiGravity"):
 @bot.command(name="windows")
 async def windows_command(ctx):
     """List all open windows."""
-    windows = list_open_windows()
+    windows = await _gui(list_open_windows)
     
     if not windows:
         await ctx.send("No visible windows found.")
@@ -792,22 +1040,41 @@ async def windows_command(ctx):
     await ctx.send("\n".join(lines))
 
 
+PROJECTS_FILE = Path(__file__).parent / "projects.json"
+
+# Parsed projects.json with pre-lowercased names, reloaded only when the file changes
+_projects_cache = {"mtime": None, "projects": [], "names_lower": []}
+
+
+def load_projects() -> list:
+    """
+    Return the projects from projects.json (None if the file is missing).
+    The file is only re-parsed when its modification time changes.
+    """
+    try:
+        mtime = PROJECTS_FILE.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    
+    if mtime != _projects_cache["mtime"]:
+        with open(PROJECTS_FILE) as f:
+            config = json.load(f)
+        projects = config.get("projects", [])
+        _projects_cache["projects"] = projects
+        _projects_cache["names_lower"] = [proj['name'].lower() for proj in projects]
+        _projects_cache["mtime"] = mtime
+    
+    return _projects_cache["projects"]
+
+
 @bot.command(name="project")
 async def project_command(ctx, *, query: str = None):
     """Open a project in AntiGravity by number or name search."""
-    import json
-    
-    # Load projects from config
-    projects_file = Path(__file__).parent / "projects.json"
-    if not projects_file.exists():
+    projects = load_projects()
+    if projects is None:
         await ctx.send("❌ No `projects.json` found. Please create it first.")
         return
     
-    with open(projects_file) as f:
-        config = json.load(f)
-    
-    projects = config.get("projects", [])
-    
     if not query:
         # Show numbered list
         lines = ["**📂 Available Projects:**\n"]
@@ -828,8 +1095,8 @@ async def project_command(ctx, *, query: str = None):
     # Try to match by name (fuzzy)
     if not selected:
         query_lower = query.lower()
-        for proj in projects:
-            if query_lower in proj['name'].lower():
+        for name_lower, proj in zip(_projects_cache["names_lower"], projects):
+            if query_lower in name_lower:
                 selected = proj
                 break
     
@@ -839,15 +1106,12 @@ async def project_command(ctx, *, query: str = None):
     
     await ctx.send(f"📂 Opening: **{selected['name']}**\n`{selected['path']}`...")
     
-    if open_project(selected['path']):
+    if await _gui(open_project, selected['path']):
         await ctx.send(f"✅ Project opened!")
     else:
         await ctx.send(f"❌ Failed to open project. Check if path exists.")
 
 
-# Model selector anchor
-MODEL_SELECTOR_ANCHOR = ANCHORS_PATH / "model_selector.png"
-
 # Model mapping (1-indexed for user convenience)
 MODELS = {
     1: "Gemini 3 Pro (High)",
@@ -860,6 +1124,36 @@ MODELS = {
 }
 
 
+def select_model(model_num: int) -> bool:
+    """
+    Open the model dropdown via its visual anchor and click the given model.
+    Blocking; returns False if the model selector isn't visible.
+    """
+    location = locate_anchor(MODEL_SELECTOR_ANCHOR, confidence=0.7)
+    if not location:
+        return False
+    
+    center = pyautogui.center(location)
+    # Click to open the dropdown
+    pyautogui.click(center.x, center.y)
+    time.sleep(0.5)
+    
+    # Click on the model tab - the dropdown appears ABOVE the button
+    # Each tab is approximately 30px tall, tabs are stacked upward
+    # model_num 1 is at the top, model_num 7 is closest to button
+    tab_height = 30  # Approximate height of each tab
+    total_models = len(MODELS)
+    
+    # Calculate Y position: from button, go UP by (total - model_num + 1) * tab_height
+    # This puts model 1 at the top and model 7 closest to button
+    offset_from_button = (total_models - model_num + 1) * tab_height
+    target_y = center.y - offset_from_button
+    
+    pyautogui.click(center.x, target_y)
+    time.sleep(0.3)
+    return True
+
+
 @bot.command(name="model")
 async def model_command(ctx, model_num: int = None):
     """
@@ -878,47 +1172,21 @@ async def model_command(ctx, model_num: int = None):
     
     try:
         # First, focus the IDE window
-        if not find_and_focus_ide_window():
+        if not await _gui(find_and_focus_ide_window):
             await ctx.send("❌ Could not find IDE window")
             return
         
         model_name = MODELS[model_num]
         await ctx.send(f"🔄 Switching to: `{model_name}`...")
         
-        # Try to click on the model selector using visual anchor
-        if MODEL_SELECTOR_ANCHOR.exists():
-            location = pyautogui.locateOnScreen(
-                str(MODEL_SELECTOR_ANCHOR),
-                confidence=0.7,
-                grayscale=True
-            )
-            if location:
-                center = pyautogui.center(location)
-                # Click to open the dropdown
-                pyautogui.click(center.x, center.y)
-                time.sleep(0.5)
-                
-                # Click on the model tab - the dropdown appears ABOVE the button
-                # Each tab is approximately 30px tall, tabs are stacked upward
-                # model_num 1 is at the top, model_num 7 is closest to button
-                tab_height = 30  # Approximate height of each tab
-                total_models = len(MODELS)
-                
-                # Calculate Y position: from button, go UP by (total - model_num + 1) * tab_height
-                # This puts model 1 at the top and model 7 closest to button
-                offset_from_button = (total_models - model_num + 1) * tab_height
-                target_y = center.y - offset_from_button
-                
-                pyautogui.click(center.x, target_y)
-                time.sleep(0.3)
-                
-            else:
-                await ctx.send("⚠️ Could not find model selector. Try `--calibrate-model`")
-                return
-        else:
+        if not MODEL_SELECTOR_ANCHOR.exists():
             await ctx.send("⚠️ Model selector anchor not set. Run `--calibrate-model` first.")
             return
         
+        if not await _gui(select_model, model_num):
+            await ctx.send("⚠️ Could not find model selector. Try `--calibrate-model`")
+            return
+        
         await ctx.send(f"✅ Switched to: `{model_name}`")
         
     except Exception as e:
@@ -926,8 +1194,21 @@ async def model_command(ctx, model_num: int = None):
 
 
 # ----- Command Approval System -----
-# Global approval watcher
+# Global approval watcher and window-open event hook
 approval_watcher = None
+approval_hook = None
+
+# Approval detection runs on its own below-normal-priority thread so screen
+# grabs and template matching never hold up the bot loop. Polling backs off
+# while nothing is happening; pasting a message (note_approval_activity)
+# resets it to the fast rate. Window-open events trigger extra checks, but
+# inline webview dialogs don't always raise one, so polling never stops.
+APPROVAL_MIN_INTERVAL = 3
+APPROVAL_MAX_INTERVAL = 30
+APPROVAL_MISSES_BEFORE_BACKOFF = 3
+_approval_wake = threading.Event()
+_approval_reset = False
+_approval_thread = None
 
 
 @bot.command(name="approve")
@@ -936,6 +1217,7 @@ async def approve_command(ctx):
     global approval_watcher
     if approval_watcher and approval_watcher.pending_approval:
         await approval_watcher.handle_response(approved=True)
+        note_approval_activity()  # Another dialog often follows
         await ctx.send("✅ Command approved!")
     else:
         await ctx.send("ℹ️ No command pending approval.")
@@ -953,6 +1235,7 @@ async def reject_command(ctx):
     global approval_watcher
     if approval_watcher and approval_watcher.pending_approval:
         await approval_watcher.handle_response(approved=False)
+        note_approval_activity()  # Another dialog often follows
         await ctx.send("❌ Command rejected!")
     else:
         await ctx.send("ℹ️ No command pending approval.")
@@ -964,17 +1247,77 @@ async def no_command(ctx):
     await reject_command(ctx)
 
 
-@tasks.loop(seconds=10)
-async def check_for_approval_dialogs():
-    """Background task to check for approval dialogs on screen."""
-    global approval_watcher
+def note_approval_activity():
+    """The agent is about to act: restart the fast polling schedule."""
+    global _approval_reset
+    _approval_reset = True
+    _approval_wake.set()
+
+
+def request_approval_check():
+    """Check for a dialog right away. Safe to call from any thread."""
+    _approval_wake.set()
+
+
+def check_approval_once() -> bool:
+    """
+    Check the screen once for an approval dialog and notify Discord.
+    Returns True if a dialog was found or one is already pending.
+    """
     if approval_watcher is None:
-        return
+        return False
+    if approval_watcher.pending_approval:
+        return True
+    
+    # Grab once and check every dialog anchor against the same frame
+    if not approval_watcher.detect_any_dialog(grab_gray()):
+        return False
     
-    if not approval_watcher.pending_approval:
-        # Check for any type of approval dialog (file access or CLI command)
-        if approval_watcher.detect_any_dialog():
-            await approval_watcher.take_screenshot_and_notify()
+    # Capture on this thread while the dialog is fresh, so the bot loop
+    # only has to upload. Wait for the notification so pending_approval
+    # is set before the next check.
+    image = approval_watcher.capture_screenshot()
+    asyncio.run_coroutine_threadsafe(
+        approval_watcher.take_screenshot_and_notify(image), bot.loop
+    ).result(timeout=30)
+    return True
+
+
+def approval_poll_loop():
+    """Approval detection thread: poll with adaptive backoff."""
+    global _approval_reset
+    if os.name == "nt":
+        import ctypes
+        THREAD_PRIORITY_BELOW_NORMAL = -1
+        ctypes.windll.kernel32.SetThreadPriority(
+            ctypes.windll.kernel32.GetCurrentThread(), THREAD_PRIORITY_BELOW_NORMAL
+        )
+    
+    interval = APPROVAL_MIN_INTERVAL
+    misses = 0
+    while True:
+        _approval_wake.wait(interval)
+        _approval_wake.clear()
+        
+        if _approval_reset:
+            # A message was just sent; a dialog can't be up yet, so restart
+            # the fast schedule rather than checking immediately
+            _approval_reset = False
+            interval, misses = APPROVAL_MIN_INTERVAL, 0
+            continue
+        
+        try:
+            found = check_approval_once()
+        except Exception as e:
+            print(f"[APPROVAL] Check failed: {e}")
+            found = False
+        
+        if found:
+            interval, misses = APPROVAL_MIN_INTERVAL, 0
+        else:
+            misses += 1
+            if misses >= APPROVAL_MISSES_BEFORE_BACKOFF:
+                interval = min(interval * 2, APPROVAL_MAX_INTERVAL)
 
 
 # ----- Main Entry -----
@@ -1015,8 +1358,8 @@ Instructions:
         pos = pyautogui.position()
         
         # Capture 80x30 region around the button
-        screenshot = pyautogui.screenshot(region=(pos[0]-40, pos[1]-15, 80, 30))
-        screenshot.save(str(MODEL_SELECTOR_ANCHOR))
+        screenshot = grab_region(pos[0]-40, pos[1]-15, 80, 30)
+        save_anchor(screenshot, MODEL_SELECTOR_ANCHOR)
         print(f"\n✅ Model selector anchor saved to: {MODEL_SELECTOR_ANCHOR}")
         return
     
@@ -1039,8 +1382,8 @@ Instructions:
         pos = pyautogui.position()
         
         # Capture 40x40 region around the button
-        screenshot = pyautogui.screenshot(region=(pos[0]-20, pos[1]-20, 40, 40))
-        screenshot.save(str(SEND_BUTTON_ANCHOR))
+        screenshot = grab_region(pos[0]-20, pos[1]-20, 40, 40)
+        save_anchor(screenshot, SEND_BUTTON_ANCHOR)
         print(f"\n✅ Send button anchor saved to: {SEND_BUTTON_ANCHOR}")
         return
     
@@ -1065,8 +1408,8 @@ Instructions:
         header_pos = pyautogui.position()
         
         # Capture header anchor
-        screenshot = pyautogui.screenshot(region=(header_pos[0]-50, header_pos[1]-15, 100, 30))
-        screenshot.save(str(FILES_PANEL_CLOSE_ANCHOR))
+        screenshot = grab_region(header_pos[0]-50, header_pos[1]-15, 100, 30)
+        save_anchor(screenshot, FILES_PANEL_CLOSE_ANCHOR)
         print(f"✅ Header anchor saved.")
         
         print("""
@@ -1111,8 +1454,8 @@ Instructions:
         pos = pyautogui.position()
         
         # Capture a wider region to get both icons
-        screenshot = pyautogui.screenshot(region=(pos[0]-40, pos[1]-15, 80, 30))
-        screenshot.save(str(RESPONSE_COMPLETE_ANCHOR))
+        screenshot = grab_region(pos[0]-40, pos[1]-15, 80, 30)
+        save_anchor(screenshot, RESPONSE_COMPLETE_ANCHOR)
         print(f"\n✅ Response complete anchor saved to: {RESPONSE_COMPLETE_ANCHOR}")
         return
     
@@ -1148,6 +1491,7 @@ Instructions:
         print("[ERROR] Please set DISCORD_TOKEN in .env file!")
         return
 
+    setup_logging()
     try:
         bot.run(DISCORD_TOKEN)
     except KeyboardInterrupt:
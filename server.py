@@ -8,8 +8,7 @@ This allows hot-reloading during development.
 """
 
 import asyncio
-import threading
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 import uvicorn
@@ -19,50 +18,45 @@ import bridge
 
 
 # Global references
-discord_thread = None
-stop_event = None
+discord_task = None
 
 
-def run_discord_bot():
-    """Run the Discord bot in a separate thread."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
+async def run_discord_bot():
+    """Run the Discord bot on the server's own event loop."""
     try:
-        loop.run_until_complete(bridge.bot.start(bridge.DISCORD_TOKEN))
+        await bridge.bot.start(bridge.DISCORD_TOKEN)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         print(f"[ERROR] Discord bot crashed: {e}")
-    finally:
-        loop.close()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events for the FastAPI app."""
-    global discord_thread
+    global discord_task
     
     print("[SERVER] Starting Discord Bridge Server...")
+    bridge.setup_logging()
     
-    # Start Discord bot in a background thread
-    discord_thread = threading.Thread(target=run_discord_bot, daemon=True)
-    discord_thread.start()
-    print("[SERVER] Discord bot thread started.")
+    # Run the Discord bot as a task on uvicorn's loop, so bot and server
+    # coroutines share one loop and never hop threads
+    discord_task = asyncio.create_task(run_discord_bot())
+    print("[SERVER] Discord bot task started.")
     
-    # Start the outbox watcher
-    from watchdog.observers import Observer
-    handler = bridge.OutboxHandler(bridge.bot, bridge.DISCORD_CHANNEL_ID)
-    observer = Observer()
-    observer.schedule(handler, str(bridge.OUTBOX_PATH), recursive=False)
-    observer.start()
-    print("[SERVER] Outbox watcher started.")
+    # The outbox watcher is started by the bot's on_ready, on this same loop
     
     yield  # Server is running
     
     # Shutdown
     print("[SERVER] Shutting down...")
-    observer.stop()
-    observer.join()
+    if bridge.observer is not None:
+        bridge.observer.stop()
+        bridge.observer.join()
     await bridge.bot.close()
+    discord_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await discord_task
 
 
 app = FastAPI(
@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The bot runs from the repository root and imports "utils.<module>"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(autouse=True)
+def isolated_anchor_cache(tmp_path, monkeypatch):
+    """Keep anchor positions out of anchors/cache.json and between tests."""
+    from utils import anchor_cache
+    monkeypatch.setattr(anchor_cache, "CACHE_FILE", tmp_path / "cache.json")
+    monkeypatch.setattr(anchor_cache, "_cache", None)
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+from utils import anchor_match
+
+
+def _button(background: int, text: int, label: str = "OK") -> np.ndarray:
+    """A small low-contrast button: dark fill with a lighter label."""
+    button = np.full((20, 60), background, np.uint8)
+    cv2.putText(button, label, (18, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.5, text, 1)
+    return button
+
+
+def _save(tmp_path, template: np.ndarray):
+    path = tmp_path / "button.png"
+    cv2.imwrite(str(path), template)
+    return path
+
+
+def test_locate_finds_brightness_shifted_small_template(tmp_path):
+    # e.g. a hover highlight: the on-screen button is 40 levels brighter
+    template = _button(30, 90)
+    path = _save(tmp_path, template)
+    assert len(anchor_match._load_template(path)[0]) == 1  # Too small to downscale
+
+    screen = np.full((300, 400), 5, np.uint8)
+    screen[100:120, 200:260] = template + 40
+
+    box = anchor_match.locate(path, 0.8, screen, region="full")
+    assert box is not None
+    assert (box.left, box.top) == (200, 100)
+
+
+def test_locate_finds_shifted_match_past_sqdiff_decoy(tmp_path):
+    # A same-coloured button with another label is SQDIFF's closest hit,
+    # but only the brightness-shifted real one matches CCOEFF_NORMED
+    template = _button(100, 140)
+    path = _save(tmp_path, template)
+
+    screen = np.full((300, 400), 5, np.uint8)
+    screen[40:60, 40:100] = _button(100, 140, "NO")
+    screen[200:220, 300:360] = template + 40
+
+    box = anchor_match.locate(path, 0.8, screen, region="full")
+    assert box is not None
+    assert (box.left, box.top) == (300, 200)
@@ -0,0 +1,77 @@
+"""
+Anchor Position Cache
+=====================
+Remembers where each anchor was last found, across restarts, so the
+first lookup after launch can check a small window instead of scanning
+the whole screen.
+
+Positions are stored in anchors/cache.json together with the screen size
+they were recorded at; a resolution change discards them all.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+ANCHORS_PATH = Path(__file__).parent.parent / "anchors"
+CACHE_FILE = ANCHORS_PATH / "cache.json"
+
+_lock = threading.Lock()
+_cache = None  # {"screen": [w, h], "positions": {name: [x, y]}}
+
+
+def _load() -> dict:
+    global _cache
+    if _cache is None:
+        try:
+            _cache = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+            _cache.setdefault("positions", {})
+        except (OSError, ValueError):
+            _cache = {"screen": None, "positions": {}}
+    return _cache
+
+
+def _save():
+    tmp_path = CACHE_FILE.with_suffix(".tmp")
+    try:
+        tmp_path.write_text(json.dumps(_cache), encoding="utf-8")
+        os.replace(tmp_path, CACHE_FILE)
+    except OSError as e:
+        print(f"[WARN] Could not save anchor cache: {e}")
+
+
+def get_cached_pos(anchor_name: str, screen_size: tuple) -> Optional[tuple]:
+    """
+    Return the last known (x, y) of an anchor, or None if it was never
+    found or was recorded at a different screen size.
+    """
+    with _lock:
+        cache = _load()
+        if cache.get("screen") != list(screen_size):
+            return None
+        pos = cache["positions"].get(anchor_name)
+        return tuple(pos) if pos else None
+
+
+def set_cached_pos(anchor_name: str, pos: tuple, screen_size: tuple):
+    """Record where an anchor was found. Only writes when something changed."""
+    with _lock:
+        cache = _load()
+        if cache.get("screen") != list(screen_size):
+            cache["screen"] = list(screen_size)
+            cache["positions"] = {}
+        if cache["positions"].get(anchor_name) == list(pos):
+            return
+        cache["positions"][anchor_name] = list(pos)
+        _save()
+
+
+def invalidate(anchor_name: str):
+    """Forget an anchor's position (e.g. after re-calibrating it)."""
+    with _lock:
+        cache = _load()
+        if cache["positions"].pop(anchor_name, None) is not None:
+            _save()
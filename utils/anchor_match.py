@@ -0,0 +1,524 @@
+"""
+Anchor Matching
+===============
+Locates visual anchors on screen with OpenCV template matching.
+
+Anchor images are stored on disk as 8-bit grayscale PNGs, decoded once
+and cached as uint8 arrays (keeping matchTemplate on its fast 8U path)
+until the file changes, and the screen is grabbed through a persistent
+mss handle (pyautogui when mss isn't installed). This replaces
+pyautogui.locateOnScreen, which re-reads the PNG and converts a fresh
+PIL screenshot on every call.
+
+Searches run coarse-to-fine: the screen and template are matched at
+reduced resolution first, and full-resolution matching only runs on
+small regions around the coarse candidates. Once an anchor has been
+found, later lookups check around its last position before scanning the
+whole screen. In large regions a cheap TM_SQDIFF pass proposes the
+likely position and the normalized correlation verifies just that spot.
+SQDIFF isn't brightness invariant, so when it has no close hit, or its
+hit doesn't verify, the whole region gets the normalized pass.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+from pyscreeze import Box
+
+try:
+    from utils import anchor_cache
+    from utils.match_kernel import ncc
+except ImportError:  # Imported from inside utils/ by a calibration script
+    import anchor_cache
+    from match_kernel import ncc
+
+try:
+    import mss
+except ImportError:  # Fall back to pyautogui's PIL screenshots
+    mss = None
+
+
+# Pyramid settings: each level halves both dimensions
+PYRAMID_LEVELS = 2         # Default coarse level for locate()
+MAX_PYRAMID_LEVELS = 3     # Levels built per template; callers may pick fewer
+MIN_PYRAMID_SIZE = 12      # Don't shrink templates below this many pixels
+COARSE_TOLERANCE = 0.15    # Coarse threshold = confidence - tolerance
+MAX_CANDIDATES = 8         # Too many coarse hits -> plain full-res search
+
+# SQDIFF prefilter: when the best position's squared difference is below
+# this fraction of the template's energy (sum of squared pixels),
+# CCOEFF_NORMED verifies a small crop around it instead of the whole
+# region. Plain TM_SQDIFF skips the per-position normalization and runs
+# about twice as fast as the _NORMED variants on 8-bit input. It is not
+# brightness invariant, so a region without a close hit (or whose hit
+# doesn't verify) still gets the full CCOEFF_NORMED pass.
+SQDIFF_VERIFY = 0.3
+VERIFY_MARGIN = 2
+PREFILTER_MIN_RATIO = 16   # Only prefilter regions this many times the template area
+
+# Pixels searched around an anchor's last known position before a full scan
+HINT_MARGIN = 96
+
+# Named search regions as (left, top, right, bottom) fractions of the screen.
+# Anchors are assigned a region in anchors/regions.json; unlisted anchors
+# search the full screen.
+SEARCH_REGIONS = {
+    "full": (0.0, 0.0, 1.0, 1.0),
+    "right_half": (0.5, 0.0, 1.0, 1.0),
+    "center": (0.2, 0.2, 0.8, 0.8),
+    "bottom_half": (0.0, 0.5, 1.0, 1.0),
+    "top_right": (0.5, 0.0, 1.0, 0.5),
+}
+REGIONS_FILE = "regions.json"
+
+# Anchors are small UI crops, so favour save speed over file size
+PNG_COMPRESSION = 1
+
+# Seconds between checks that a cached anchor's PNG hasn't been replaced
+# (e.g. by a calibration script running in another process)
+ANCHOR_RECHECK_INTERVAL = 5.0
+
+# Decoded grayscale template pyramids, keyed by anchor path
+_ANCHOR_CACHE = {}
+
+# Zero-mean, unit-norm float32 templates for scoring a single position
+_NORMALIZED = {}
+
+# (mtime, last checked) of each cached anchor file
+_ANCHOR_MTIME = {}
+
+# Anchors are loaded from the match pool, the GUI thread, the approval
+# poller and the recorder at once; the three dicts above change together
+# under this lock. Reentrant because loading may forget a stale entry.
+_anchor_lock = threading.RLock()
+
+# Parsed regions.json per anchors directory
+_REGION_CACHE = {}
+
+# Top-left corner of each anchor's most recent match
+_last_hit = {}
+
+# mss handles are not thread-safe, so keep one per thread
+_local = threading.local()
+
+# Downscaled levels of the most recent screen, shared by all threads
+_screen_cache = (None, [])
+_screen_lock = threading.Lock()
+
+# OpenCV releases the GIL while matching, so separate anchors can be
+# matched in parallel. Cap OpenCV's own threading so the two don't
+# oversubscribe the CPU.
+cv2.setNumThreads(2)
+MATCH_POOL = ThreadPoolExecutor(max_workers=max(2, (os.cpu_count() or 2) // 2),
+                                thread_name_prefix="anchor")
+
+
+def _get_sct():
+    """Return this thread's mss instance, creating it on first use."""
+    sct = getattr(_local, "sct", None)
+    if sct is None:
+        sct = mss.mss()
+        _local.sct = sct
+    return sct
+
+
+def _build_pyramid(template: np.ndarray) -> list:
+    """Build [full, half, quarter, ...] versions of a template."""
+    pyramid = [template]
+    while len(pyramid) <= MAX_PYRAMID_LEVELS:
+        h, w = pyramid[-1].shape
+        if min(h, w) // 2 < MIN_PYRAMID_SIZE:
+            break
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+def _normalize(template: np.ndarray) -> np.ndarray:
+    """Subtract the mean and scale to unit L2 norm, once per template."""
+    t = template.astype(np.float32)
+    t -= t.mean()
+    t /= np.linalg.norm(t) + 1e-6
+    return t
+
+
+def _score_at(screen_gray: np.ndarray, t_norm: np.ndarray, x: int, y: int) -> float:
+    """
+    TM_CCOEFF_NORMED score of the template at exactly (x, y). With the
+    template pre-normalized this is one pass over the patch.
+    """
+    h, w = t_norm.shape
+    patch = screen_gray[y:y + h, x:x + w]
+    if patch.shape != t_norm.shape:
+        return -1.0
+    return ncc(patch, t_norm)
+
+
+def _forget_anchor(path: Path):
+    """Drop everything cached for an anchor so it is decoded and found afresh."""
+    with _anchor_lock:
+        _ANCHOR_CACHE.pop(path, None)
+        _NORMALIZED.pop(path, None)
+        _ANCHOR_MTIME.pop(path, None)
+        _last_hit.pop(path, None)
+    anchor_cache.invalidate(path.name)
+
+
+def _load_template(path: Path) -> Optional[tuple]:
+    """
+    Return (pyramid, normalized template) from the cache, decoding the PNG
+    on first use. The file's mtime is checked every ANCHOR_RECHECK_INTERVAL
+    seconds and the anchor re-decoded if it changed. Both are returned
+    together so callers never look them up again after a reload.
+    """
+    with _anchor_lock:
+        pyramid = _ANCHOR_CACHE.get(path)
+        if pyramid is not None:
+            mtime, checked = _ANCHOR_MTIME[path]
+            now = time.monotonic()
+            if now - checked < ANCHOR_RECHECK_INTERVAL:
+                return pyramid, _NORMALIZED[path]
+            try:
+                current = path.stat().st_mtime
+            except OSError:
+                current = None
+            if current == mtime:
+                _ANCHOR_MTIME[path] = (mtime, now)
+                return pyramid, _NORMALIZED[path]
+            _forget_anchor(path)
+
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        template = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            return None
+        assert template.dtype == np.uint8 and template.ndim == 2, \
+            f"Anchor {path.name} did not decode to 8-bit grayscale"
+        pyramid = _build_pyramid(template)
+        t_norm = _normalize(template)
+        _ANCHOR_CACHE[path] = pyramid
+        _NORMALIZED[path] = t_norm
+        _ANCHOR_MTIME[path] = (mtime, time.monotonic())
+        return pyramid, t_norm
+
+
+def save_anchor(image, path: Path):
+    """
+    Save a calibration capture as an 8-bit grayscale anchor PNG.
+
+    Args:
+        image: BGR/BGRA array (as returned by grab_region) or PIL image
+        path: Anchor image path
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3:
+            code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            gray = cv2.cvtColor(image, code)
+        else:
+            gray = image
+    else:
+        gray = np.asarray(image.convert("L"))
+    cv2.imwrite(str(path), gray.astype(np.uint8), [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+
+    # Drop any stale pyramid and position for this anchor
+    _forget_anchor(path)
+
+
+def load_anchor(path: Path) -> Optional[np.ndarray]:
+    """
+    Return the grayscale template for an anchor image.
+    The PNG is decoded on first use only. Returns None if it doesn't exist.
+    """
+    loaded = _load_template(path)
+    return loaded[0][0] if loaded else None
+
+
+def grab_screen() -> np.ndarray:
+    """Grab the primary monitor as a BGRA array."""
+    if mss is None:
+        import pyautogui
+        return cv2.cvtColor(np.asarray(pyautogui.screenshot()), cv2.COLOR_RGB2BGRA)
+    sct = _get_sct()
+    return np.asarray(sct.grab(sct.monitors[1]))
+
+
+def grab_encoded(ext: str, params: list) -> bytes:
+    """Grab the primary monitor and encode it in memory (ext like ".png")."""
+    frame = cv2.cvtColor(grab_screen(), cv2.COLOR_BGRA2BGR)
+    ok, buf = cv2.imencode(ext, frame, params)
+    if not ok:
+        raise RuntimeError(f"{ext} encoding failed")
+    return buf.tobytes()
+
+
+def grab_png(compression: int = 3) -> bytes:
+    """Grab the primary monitor and encode it as PNG in memory."""
+    return grab_encoded(".png", [cv2.IMWRITE_PNG_COMPRESSION, compression])
+
+
+def grab_webp(quality: int = 70) -> bytes:
+    """Grab the primary monitor and encode it as lossy WebP in memory."""
+    return grab_encoded(".webp", [cv2.IMWRITE_WEBP_QUALITY, quality])
+
+
+def grab_region(left: int, top: int, width: int, height: int) -> np.ndarray:
+    """Grab part of the screen as a BGRA array."""
+    if mss is None:
+        import pyautogui
+        shot = pyautogui.screenshot(region=(left, top, width, height))
+        return cv2.cvtColor(np.asarray(shot), cv2.COLOR_RGB2BGRA)
+    return np.asarray(_get_sct().grab(
+        {"left": left, "top": top, "width": width, "height": height}
+    ))
+
+
+def grab_gray() -> np.ndarray:
+    """Grab the primary monitor as a grayscale array."""
+    return cv2.cvtColor(grab_screen(), cv2.COLOR_BGRA2GRAY)
+
+
+def _anchor_region(path: Path) -> str:
+    """Return the search region name configured for an anchor."""
+    regions = _REGION_CACHE.get(path.parent)
+    if regions is None:
+        regions_file = path.parent / REGIONS_FILE
+        try:
+            regions = json.loads(regions_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            regions = {}
+        _REGION_CACHE[path.parent] = regions
+    return regions.get(path.name, "full")
+
+
+def _region_bounds(path: Path, region, screen_w: int, screen_h: int) -> tuple:
+    """
+    Resolve a search region to (x0, y0, x1, y1) screen pixels.
+
+    region may be a name from SEARCH_REGIONS, a (left, top, width, height)
+    pixel tuple, or None to use the anchor's configured region.
+    """
+    if region is None:
+        region = _anchor_region(path)
+    if isinstance(region, str):
+        fx0, fy0, fx1, fy1 = SEARCH_REGIONS.get(region, SEARCH_REGIONS["full"])
+        return (int(fx0 * screen_w), int(fy0 * screen_h),
+                int(fx1 * screen_w), int(fy1 * screen_h))
+    left, top, width, height = region
+    return (max(0, left), max(0, top),
+            min(screen_w, left + width), min(screen_h, top + height))
+
+
+def locate(path: Path, confidence: float = 0.8,
+           screen_gray: Optional[np.ndarray] = None,
+           levels: int = PYRAMID_LEVELS, region=None) -> Optional[Box]:
+    """
+    Find an anchor image on screen.
+
+    Args:
+        path: Anchor image path
+        confidence: Minimum TM_CCOEFF_NORMED score to accept a match
+        screen_gray: Pre-captured grayscale screen (grabbed if omitted)
+        levels: Pyramid levels to downsample for the coarse pass (0 = off)
+        region: Where to search: a SEARCH_REGIONS name, a (left, top,
+            width, height) pixel tuple, or None for the anchor's
+            configured region
+
+    Returns:
+        Box(left, top, width, height) like pyautogui.locateOnScreen, or None
+    """
+    loaded = _load_template(path)
+    if loaded is None:
+        return None
+    pyramid, t_norm = loaded
+    pyramid = pyramid[:levels + 1]
+
+    if screen_gray is None:
+        screen_gray = grab_gray()
+
+    h, w = pyramid[0].shape
+    screen_h, screen_w = screen_gray.shape
+    bounds = _region_bounds(path, region, screen_w, screen_h)
+    bx0, by0, bx1, by1 = bounds
+    if by1 - by0 < h or bx1 - bx0 < w:
+        return None
+
+    # Anchors rarely move: try a small window around the last hit first,
+    # falling back to the position saved by a previous run
+    last = _last_hit.get(path)
+    if last is None:
+        last = anchor_cache.get_cached_pos(path.name, (screen_w, screen_h))
+    if last is not None:
+        # Usually it hasn't moved at all: score that one spot first
+        if (bx0 <= last[0] and last[0] + w <= bx1 and by0 <= last[1] and last[1] + h <= by1
+                and _score_at(screen_gray, t_norm, *last) >= confidence):
+            _remember_hit(path, last, screen_w, screen_h)
+            return Box(last[0], last[1], w, h)
+
+        x0 = max(bx0, last[0] - HINT_MARGIN)
+        y0 = max(by0, last[1] - HINT_MARGIN)
+        x1 = min(bx1, last[0] + w + HINT_MARGIN)
+        y1 = min(by1, last[1] + h + HINT_MARGIN)
+        best_val, best_loc = _best_match(screen_gray, pyramid[0], [(x0, y0, x1, y1)],
+                                         confidence, t_norm)
+        if best_loc is not None and best_val >= confidence:
+            _remember_hit(path, best_loc, screen_w, screen_h)
+            return Box(best_loc[0], best_loc[1], w, h)
+
+    if len(pyramid) > 1:
+        rois = _coarse_candidates(screen_gray, pyramid, confidence - COARSE_TOLERANCE, bounds)
+    else:
+        rois = None
+
+    if rois is None:
+        # No usable pyramid, or too ambiguous at low resolution
+        rois = [bounds]
+
+    best_val, best_loc = _best_match(screen_gray, pyramid[0], rois, confidence, t_norm)
+    if best_loc is None or best_val < confidence:
+        return None
+
+    _remember_hit(path, best_loc, screen_w, screen_h)
+    return Box(best_loc[0], best_loc[1], w, h)
+
+
+def _remember_hit(path: Path, loc: tuple, screen_w: int, screen_h: int):
+    """Record a match position in memory and, if it moved, on disk."""
+    if _last_hit.get(path) != loc:
+        _last_hit[path] = loc
+        anchor_cache.set_cached_pos(path.name, loc, (screen_w, screen_h))
+
+
+def _best_match(screen_gray: np.ndarray, template: np.ndarray, rois: list,
+                confidence: float, t_norm: Optional[np.ndarray] = None) -> tuple:
+    """
+    Return (score, (x, y)) of the best full-resolution match within rois.
+    t_norm is the pre-normalized template, used to score regions that are
+    exactly the template's size without going through matchTemplate.
+    """
+    h, w = template.shape
+    best_val, best_loc = -1.0, None
+    for x0, y0, x1, y1 in rois:
+        roi = screen_gray[y0:y1, x0:x1]
+        if roi.shape[0] < h or roi.shape[1] < w:
+            continue
+
+        if roi.shape == template.shape and t_norm is not None:
+            # Only one position to score (e.g. a search region fitted to
+            # the anchor): a single kernel pass
+            max_val = ncc(roi, t_norm)
+            if max_val > best_val:
+                best_val, best_loc = max_val, (int(x0), int(y0))
+            continue
+
+        if roi.size >= PREFILTER_MIN_RATIO * template.size:
+            result = cv2.matchTemplate(roi, template, cv2.TM_SQDIFF)
+            min_val, _, min_loc, _ = cv2.minMaxLoc(result)
+            if min_val <= SQDIFF_VERIFY * cv2.norm(template, cv2.NORM_L2SQR):
+                # Verify around the closest SQDIFF hit
+                cx0 = max(0, min_loc[0] - VERIFY_MARGIN)
+                cy0 = max(0, min_loc[1] - VERIFY_MARGIN)
+                crop = roi[cy0:min_loc[1] + h + VERIFY_MARGIN, cx0:min_loc[0] + w + VERIFY_MARGIN]
+                result = cv2.matchTemplate(crop, template, cv2.TM_CCOEFF_NORMED)
+                _, max_val, _, max_loc = cv2.minMaxLoc(result)
+                if max_val >= confidence:
+                    if max_val > best_val:
+                        best_val = max_val
+                        best_loc = (int(x0 + cx0 + max_loc[0]), int(y0 + cy0 + max_loc[1]))
+                    continue
+            # No close SQDIFF hit, or it didn't verify: a brightness shift
+            # (hover, theme) moves or inflates the SQDIFF minimum without
+            # affecting CCOEFF_NORMED, so score the whole region
+
+        result = cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if max_val > best_val:
+            best_val, best_loc = max_val, (int(x0 + max_loc[0]), int(y0 + max_loc[1]))
+    return best_val, best_loc
+
+
+def _screen_level(screen_gray: np.ndarray, level: int) -> np.ndarray:
+    """
+    Return the screen downsampled `level` times. Levels are cached for the
+    most recent screen, so anchors checked against the same grab share the
+    pyrDown work, including when they are matched on different threads.
+    """
+    global _screen_cache
+    with _screen_lock:
+        if _screen_cache[0] is not screen_gray:
+            _screen_cache = (screen_gray, [screen_gray])
+        levels = _screen_cache[1]
+        while len(levels) <= level:
+            levels.append(cv2.pyrDown(levels[-1]))
+        return levels[level]
+
+
+def _coarse_candidates(screen_gray: np.ndarray, pyramid: list,
+                       threshold: float, bounds: tuple) -> Optional[list]:
+    """
+    Match the smallest template against an equally downscaled screen,
+    within bounds (x0, y0, x1, y1).
+    Returns full-resolution (x0, y0, x1, y1) regions worth refining,
+    [] if nothing scored above threshold, or None if the coarse pass is
+    too ambiguous to be useful.
+    """
+    levels = len(pyramid) - 1
+    scale = 2 ** levels
+    bx0, by0, bx1, by1 = bounds
+
+    # Slice the cached downscaled screen rather than downscaling the region
+    sx0, sy0 = bx0 // scale, by0 // scale
+    small = _screen_level(screen_gray, levels)[sy0:by1 // scale, sx0:bx1 // scale]
+
+    template = pyramid[-1]
+    if small.shape[0] < template.shape[0] or small.shape[1] < template.shape[1]:
+        return None
+
+    result = cv2.matchTemplate(small, template, cv2.TM_CCOEFF_NORMED)
+    mask = (result >= threshold).astype(np.uint8)
+    if not mask.any():
+        return []
+
+    # Merge neighbouring hits so each blob is refined once
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    if count - 1 > MAX_CANDIDATES:
+        return None
+
+    h, w = pyramid[0].shape
+    rois = []
+    for x, y, bw, bh, _ in stats[1:]:
+        x0 = max(bx0, (sx0 + x - 1) * scale)
+        y0 = max(by0, (sy0 + y - 1) * scale)
+        x1 = min(bx1, (sx0 + x + bw + 1) * scale + w)
+        y1 = min(by1, (sy0 + y + bh + 1) * scale + h)
+        rois.append((x0, y0, x1, y1))
+    return rois
+
+
+def locate_many(anchors: dict, screen_gray: Optional[np.ndarray] = None,
+                levels: int = PYRAMID_LEVELS, region=None) -> dict:
+    """
+    Find several anchors on a single screen grab, matching them in parallel.
+
+    Args:
+        anchors: Mapping of anchor path -> confidence
+        screen_gray: Pre-captured grayscale screen (grabbed if omitted)
+        levels: Pyramid levels for the coarse pass, as for locate()
+        region: Search region for every anchor, as for locate()
+
+    Returns:
+        Mapping of anchor path -> Box or None
+    """
+    if screen_gray is None:
+        screen_gray = grab_gray()
+    futures = {path: MATCH_POOL.submit(locate, path, confidence, screen_gray, levels, region)
+               for path, confidence in anchors.items()}
+    return {path: future.result() for path, future in futures.items()}
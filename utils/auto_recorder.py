@@ -11,6 +11,7 @@ Features:
 
 import cv2
 import numpy as np
+import os
 import pyautogui
 import threading
 import asyncio
@@ -19,6 +20,9 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional, Callable
 
+from utils.anchor_match import MATCH_POOL, grab_gray, grab_region, locate
+from utils.video_encoder import VideoWriter
+
 
 # Anchor paths
 ANCHORS_PATH = Path(__file__).parent.parent / "anchors"
@@ -26,6 +30,16 @@ FILES_PANEL_CLOSE_ANCHOR = ANCHORS_PATH / "files_panel_close.png"
 RESPONSE_COMPLETE_ANCHOR = ANCHORS_PATH / "response_complete.png"  # Thumbs up/down icons
 CHAT_INPUT_ANCHOR = ANCHORS_PATH / "chat_input.png"
 
+# Recording codec: "h264" (hardware if available), "mjpeg" (cheap CPU
+# encode, larger .avi files) or "mp4v" (OpenCV software writer)
+AUTOREC_CODEC = os.getenv("AUTOREC_CODEC", "h264").lower()
+
+# Thumbnail size compared between frames to spot an unchanged screen
+CHANGE_THUMB_SIZE = (128, 72)
+
+# Coarse-to-fine depth for the recorder's anchors (2 = match at 1/4 scale first)
+PYRAMID_LEVELS = 2
+
 
 class AutoRecorder:
     """
@@ -73,7 +87,8 @@ class AutoRecorder:
         
         # Output file
         timestamp = datetime.now().strftime('%H%M%S')
-        self.output_path = self.output_dir / f"auto_recording_{timestamp}.mp4"
+        suffix = ".avi" if AUTOREC_CODEC == "mjpeg" else ".mp4"
+        self.output_path = self.output_dir / f"auto_recording_{timestamp}{suffix}"
         
         # Start recording thread
         self.recording = True
@@ -93,9 +108,7 @@ class AutoRecorder:
         """Find the chat area position using anchor."""
         try:
             if CHAT_INPUT_ANCHOR.exists():
-                location = pyautogui.locateOnScreen(
-                    str(CHAT_INPUT_ANCHOR), confidence=0.7, grayscale=True
-                )
+                location = locate(CHAT_INPUT_ANCHOR, 0.7, levels=PYRAMID_LEVELS)
                 if location:
                     center = pyautogui.center(location)
                     self.chat_position = (center.x, center.y - 200)
@@ -111,14 +124,12 @@ class AutoRecorder:
         except Exception:
             pass
     
-    def _close_files_panel(self):
+    def _close_files_panel(self, screen_gray=None):
         """Close the 'Files with changes' panel using header + offset."""
         try:
             # 1. Look for the static header anchor
             if FILES_PANEL_CLOSE_ANCHOR.exists():
-                location = pyautogui.locateOnScreen(
-                    str(FILES_PANEL_CLOSE_ANCHOR), confidence=0.7, grayscale=True
-                )
+                location = locate(FILES_PANEL_CLOSE_ANCHOR, 0.7, screen_gray, PYRAMID_LEVELS)
                 if location:
                     header_center = pyautogui.center(location)
                     
@@ -146,13 +157,12 @@ class AutoRecorder:
             pass
         return False
     
-    def _check_response_complete(self) -> bool:
+    def _check_response_complete(self, screen_gray=None) -> bool:
         """Check if response is complete by looking for rating icons."""
         try:
             if RESPONSE_COMPLETE_ANCHOR.exists():
-                location = pyautogui.locateOnScreen(
-                    str(RESPONSE_COMPLETE_ANCHOR), confidence=0.6, grayscale=True
-                )
+                location = locate(RESPONSE_COMPLETE_ANCHOR, 0.6, screen_gray, PYRAMID_LEVELS,
+                                  region=self.region)
                 return location is not None
         except Exception:
             pass
@@ -161,18 +171,30 @@ class AutoRecorder:
     def _record_loop(self):
         """Main recording loop with automation."""
         x, y, w, h = self.region
-        out_w, out_h = int(w * self.scale), int(h * self.scale)
+        # H.264 needs even dimensions
+        out_w, out_h = int(w * self.scale) // 2 * 2, int(h * self.scale) // 2 * 2
         
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(self.output_path), fourcc, self.fps, (out_w, out_h))
+        # Hardware H.264 through ffmpeg when available; ffmpeg takes the
+        # BGRA frames as-is and converts on its side
+        out = VideoWriter(self.output_path, self.fps, (out_w, out_h), pix_fmt="bgra",
+                          codec=AUTOREC_CODEC)
         
-        start_time = time.time()
         frame_interval = 1.0 / self.fps
+        start_time = time.monotonic()
+        end_time = start_time + self.max_duration
+        next_deadline = start_time  # When the next frame is due
+        
+        # Scratch buffers reused for every frame: the scaled output frame,
+        # and two change-detection thumbnails (current and previous)
+        thumb_w, thumb_h = CHANGE_THUMB_SIZE
+        frame_buf = np.empty((out_h, out_w, 4), dtype=np.uint8)
+        thumb_buf = np.empty((thumb_h, thumb_w, 4), dtype=np.uint8)
+        last_thumb = np.empty_like(thumb_buf)
+        have_frame = False
         
         try:
-            while self.recording and (time.time() - start_time) < self.max_duration:
-                frame_start = time.time()
-                current_time = time.time()
+            while self.recording and time.monotonic() < end_time:
+                current_time = time.monotonic()
                 
                 # Auto-scroll every 3 seconds
                 if current_time - self.last_scroll_time > self.scroll_interval:
@@ -181,27 +203,42 @@ class AutoRecorder:
                 
                 # Check for files panel and response completion every 2 seconds
                 if current_time - self.last_check_time > self.check_interval:
-                    self._close_files_panel()
+                    # One grab serves both anchor checks this tick, and the
+                    # completion check runs alongside the files panel one
+                    screen_gray = grab_gray()
+                    complete = MATCH_POOL.submit(self._check_response_complete, screen_gray)
+                    self._close_files_panel(screen_gray)
                     
                     # Check if response is complete
-                    if self._check_response_complete():
+                    if complete.result():
                         # Response complete! Record a few more seconds then stop
-                        time.sleep(2)
-                        self.recording = False
+                        end_time = min(end_time, current_time + 2)
                     
                     self.last_check_time = current_time
                 
-                # Capture frame
-                screenshot = pyautogui.screenshot(region=(x, y, w, h))
-                frame = np.array(screenshot)
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                frame = cv2.resize(frame, (out_w, out_h))
-                out.write(frame)
+                # If a check stalled past whole frame slots, repeat the last
+                # frame for them so the video stays in step with real time
+                if have_frame:
+                    while time.monotonic() - next_deadline >= frame_interval:
+                        out.write(frame_buf)
+                        next_deadline += frame_interval
+                
+                # Capture frame; when nothing changed (the IDE is idle) reuse
+                # the previous output frame instead of resizing a new one
+                grab = grab_region(x, y, w, h)
+                cv2.resize(grab, CHANGE_THUMB_SIZE, dst=thumb_buf, interpolation=cv2.INTER_AREA)
+                if not have_frame or not np.array_equal(thumb_buf, last_thumb):
+                    cv2.resize(grab, (out_w, out_h), dst=frame_buf, interpolation=cv2.INTER_AREA)
+                    thumb_buf, last_thumb = last_thumb, thumb_buf
+                    have_frame = True
+                out.write(frame_buf)
                 
-                # Maintain FPS
-                elapsed = time.time() - frame_start
-                if elapsed < frame_interval:
-                    time.sleep(frame_interval - elapsed)
+                # Sleep until the next deadline; pacing against a fixed
+                # schedule keeps per-iteration overhead from accumulating
+                next_deadline += frame_interval
+                delay = next_deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
                     
         finally:
             out.release()
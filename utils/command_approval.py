@@ -10,16 +10,32 @@ approval dialog appears on screen.
 
 import time
 import asyncio
+import io
+import threading
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
+import cv2
+import numpy as np
 import pyautogui
 import discord
 
+try:
+    from utils.anchor_match import (MAX_PYRAMID_LEVELS, grab_gray, grab_region, grab_webp,
+                                    locate, locate_many, save_anchor)
+except ImportError:  # Run directly as a calibration script
+    from anchor_match import (MAX_PYRAMID_LEVELS, grab_gray, grab_region, grab_webp,
+                              locate, locate_many, save_anchor)
+
 
 # Anchor images for permission dialogs
 ANCHORS_PATH = Path(__file__).parent.parent / "anchors"
 
+# Approval screenshots are only viewed in Discord, so lossy WebP is fine:
+# about half the bytes of PNG and much quicker to encode
+SCREENSHOT_WEBP_QUALITY = 70
+
 # File access approval (existing)
 APPROVAL_DIALOG_ANCHOR = ANCHORS_PATH / "approval_dialog.png"
 APPROVE_BUTTON_ANCHOR = ANCHORS_PATH / "approve_button.png"
@@ -30,87 +46,240 @@ CLI_COMMAND_ANCHOR = ANCHORS_PATH / "cli_command_dialog.png"
 CLI_APPROVE_BUTTON_ANCHOR = ANCHORS_PATH / "cli_approve_button.png"
 CLI_REJECT_BUTTON_ANCHOR = ANCHORS_PATH / "cli_reject_button.png"
 
+# Dialog anchors checked each poll, in order
+DIALOG_ANCHORS = [
+    (APPROVAL_DIALOG_ANCHOR, 'file_access'),
+    (CLI_COMMAND_ANCHOR, 'cli_command'),
+]
+
+# Dialog anchors are large crops, so they can take the deepest coarse pass
+# (1/8 scale); with no dialog up, that pass finds nothing and the full
+# resolution match never runs
+DIALOG_PYRAMID_LEVELS = MAX_PYRAMID_LEVELS
+
+# Thumbnail compared between polls; if the screen hasn't changed the
+# previous detection result still holds and matching is skipped
+CHANGE_THUMB_SIZE = (64, 36)
+
+# Notification title and description per dialog type
+APPROVAL_MESSAGES = {
+    'cli_command': ("⚡ CLI Command Execution Request!",
+                    "A terminal command is waiting for approval."),
+    'file_access': ("📁 File Access Request!",
+                    "A file operation is waiting for approval."),
+}
+APPROVAL_REPLY_HELP = (
+    " Reply with:\n"
+    "• `!approve` or `!yes` - to approve\n"
+    "• `!reject` or `!no` - to reject"
+)
+
+# Pixels around the detected dialog searched for its buttons before
+# falling back to the whole screen
+BUTTON_SEARCH_MARGIN = 80
+
+
+# UI Automation constants (UIAutomationClient.h)
+UIA_WINDOW_OPENED_EVENT_ID = 20016
+TREE_SCOPE_SUBTREE = 7
+
+
+class WindowOpenedHook:
+    """
+    Calls a function whenever a window opens, using a UI Automation event
+    subscription instead of polling the screen. Windows only.
+
+    The callback runs on a UI Automation worker thread; use
+    asyncio.run_coroutine_threadsafe to get back onto the bot loop.
+    """
+    
+    def __init__(self, callback):
+        self.callback = callback
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._started = False
+        self.thread = None
+    
+    def start(self, timeout: float = 5.0) -> bool:
+        """Subscribe to window-opened events. Returns False if unavailable."""
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self._ready.wait(timeout)
+        return self._started
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _run(self):
+        try:
+            import comtypes
+            import uiautomation as auto
+            
+            # UIA recommends MTA threads for event handlers
+            comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+            client = auto._AutomationClient.instance()
+            uia = client.IUIAutomation
+            callback = self.callback
+            
+            class _Handler(comtypes.COMObject):
+                _com_interfaces_ = [client.UIAutomationCore.IUIAutomationEventHandler]
+                
+                def HandleAutomationEvent(self, sender, event_id):
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"[APPROVAL] Window hook callback error: {e}")
+            
+            handler = _Handler()
+            uia.AddAutomationEventHandler(
+                UIA_WINDOW_OPENED_EVENT_ID,
+                uia.GetRootElement(),
+                TREE_SCOPE_SUBTREE,
+                None,
+                handler
+            )
+        except Exception as e:
+            print(f"[APPROVAL] UI Automation events unavailable: {e}")
+            self._ready.set()
+            return
+        
+        self._started = True
+        self._ready.set()
+        
+        # Keep the subscription (and this COM apartment) alive
+        self._stop.wait()
+        try:
+            uia.RemoveAllEventHandlers()
+        except Exception:
+            pass
+
 
 class CommandApprovalWatcher:
     """
     Watches the screen for command approval dialogs and allows remote approval.
     """
     
-    def __init__(self, bot, channel_id):
+    def __init__(self, bot, channel_id, search_region=None, gui_executor=None):
+        """
+        Args:
+            search_region: Where to look for dialogs: a SEARCH_REGIONS name
+                or a (left, top, width, height) pixel tuple. None uses each
+                anchor's region from anchors/regions.json ("right_half" for
+                the dialogs).
+            gui_executor: Executor that runs the button clicks, so they are
+                serialized with the caller's other input (None = asyncio's
+                default executor)
+        """
         self.bot = bot
         self.channel_id = channel_id
+        self.search_region = search_region
+        self.gui_executor = gui_executor
         self.pending_approval = False
-        self.last_screenshot_path = None
         self.watching = False
         self.dialog_type = None  # 'file_access' or 'cli_command'
+        self.dialog_box = None  # Where the dialog anchor matched
+        
+        # Notification embeds per dialog type, built once
+        self._embeds = {
+            dialog_type: discord.Embed(title=title, description=description + APPROVAL_REPLY_HELP)
+            for dialog_type, (title, description) in APPROVAL_MESSAGES.items()
+        }
+        
+        # Change detection for detect_any_dialog
+        self._last_thumb = None
+        self._last_found = False
     
-    def detect_approval_dialog(self) -> bool:
-        """
-        Check if a file access approval dialog is visible on screen.
-        Returns True if found.
-        """
-        if not APPROVAL_DIALOG_ANCHOR.exists():
+    def _detect(self, anchor: Path, dialog_type: str, screen_gray) -> bool:
+        """Look for one dialog anchor, recording its type if found."""
+        if not anchor.exists():
             return False
         
         try:
-            location = pyautogui.locateOnScreen(
-                str(APPROVAL_DIALOG_ANCHOR),
-                confidence=0.7,
-                grayscale=True
-            )
+            location = locate(anchor, 0.7, screen_gray, DIALOG_PYRAMID_LEVELS,
+                              region=self.search_region)
             if location is not None:
-                self.dialog_type = 'file_access'
+                self.dialog_type = dialog_type
+                self.dialog_box = location
                 return True
             return False
         except Exception:
             return False
     
-    def detect_cli_command_dialog(self) -> bool:
+    def detect_approval_dialog(self, screen_gray=None) -> bool:
+        """
+        Check if a file access approval dialog is visible on screen.
+        Returns True if found.
+        """
+        return self._detect(APPROVAL_DIALOG_ANCHOR, 'file_access', screen_gray)
+    
+    def detect_cli_command_dialog(self, screen_gray=None) -> bool:
         """
         Check if a CLI command execution dialog is visible on screen.
         Returns True if found.
         """
-        if not CLI_COMMAND_ANCHOR.exists():
-            return False
-        
-        try:
-            location = pyautogui.locateOnScreen(
-                str(CLI_COMMAND_ANCHOR),
-                confidence=0.7,
-                grayscale=True
-            )
-            if location is not None:
-                self.dialog_type = 'cli_command'
-                return True
-            return False
-        except Exception:
-            return False
+        return self._detect(CLI_COMMAND_ANCHOR, 'cli_command', screen_gray)
     
-    def detect_any_dialog(self) -> bool:
+    def _detect_all(self, screen_gray) -> Optional[tuple]:
+        """
+        Match every dialog anchor against one grayscale grab, in parallel.
+        Returns (dialog_type, Box) for the first hit in DIALOG_ANCHORS
+        order, or None.
+        """
+        available = [(anchor, dialog_type) for anchor, dialog_type in DIALOG_ANCHORS
+                     if anchor.exists()]
+        found = locate_many({anchor: 0.7 for anchor, _ in available}, screen_gray,
+                            DIALOG_PYRAMID_LEVELS, self.search_region)
+        for anchor, dialog_type in available:
+            if found[anchor] is not None:
+                return dialog_type, found[anchor]
+        return None
+    
+    def detect_any_dialog(self, screen_gray=None) -> bool:
         """
         Check for any type of approval dialog.
         Returns True if any dialog is found.
+        
+        Args:
+            screen_gray: Pre-captured grayscale screen shared by every
+                anchor check (grabbed once here if omitted)
         """
-        return self.detect_approval_dialog() or self.detect_cli_command_dialog()
-    
-    def click_approve(self) -> bool:
-        """Click the approve button based on dialog type."""
-        # Select appropriate anchor based on dialog type
-        if self.dialog_type == 'cli_command':
-            anchor = CLI_APPROVE_BUTTON_ANCHOR
-        else:
-            anchor = APPROVE_BUTTON_ANCHOR
+        try:
+            if screen_gray is None:
+                screen_gray = grab_gray()
+            
+            # An idle screen gives the same answer as last time
+            thumb = cv2.resize(screen_gray, CHANGE_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+            if self._last_thumb is not None and np.array_equal(thumb, self._last_thumb):
+                return self._last_found
+            
+            hit = self._detect_all(screen_gray)
+        except Exception:
+            return False
         
+        self._last_thumb = thumb
+        self._last_found = hit is not None
+        if hit is not None:
+            self.dialog_type, self.dialog_box = hit
+        return self._last_found
+    
+    def _click_button(self, anchor: Path, fallback_key: str) -> bool:
+        """Click a dialog button, pressing fallback_key if it can't be found."""
         if not anchor.exists():
-            # Fallback: press Enter (often approves)
-            pyautogui.press("enter")
+            pyautogui.press(fallback_key)
             return True
         
         try:
-            location = pyautogui.locateOnScreen(
-                str(anchor),
-                confidence=0.8
-            )
+            screen_gray = grab_gray()
+            location = None
+            # The button sits in or next to the dialog that was detected,
+            # so search around it before scanning the whole screen
+            if self.dialog_box is not None:
+                left, top, width, height = self.dialog_box
+                region = (left - BUTTON_SEARCH_MARGIN, top - BUTTON_SEARCH_MARGIN,
+                          width + 2 * BUTTON_SEARCH_MARGIN, height + 2 * BUTTON_SEARCH_MARGIN)
+                location = locate(anchor, 0.8, screen_gray, region=region)
+            if location is None:
+                location = locate(anchor, 0.8, screen_gray)
             if location:
                 center = pyautogui.center(location)
                 pyautogui.click(center.x, center.y)
@@ -119,9 +288,20 @@ class CommandApprovalWatcher:
             pass
         
         # Fallback
-        pyautogui.press("enter")
+        pyautogui.press(fallback_key)
         return True
     
+    def click_approve(self) -> bool:
+        """Click the approve button based on dialog type."""
+        # Select appropriate anchor based on dialog type
+        if self.dialog_type == 'cli_command':
+            anchor = CLI_APPROVE_BUTTON_ANCHOR
+        else:
+            anchor = APPROVE_BUTTON_ANCHOR
+        
+        # Enter often approves
+        return self._click_button(anchor, "enter")
+    
     def click_reject(self) -> bool:
         """Click the reject button based on dialog type."""
         # Select appropriate anchor based on dialog type
@@ -130,54 +310,38 @@ class CommandApprovalWatcher:
         else:
             anchor = REJECT_BUTTON_ANCHOR
         
-        if not anchor.exists():
-            # Fallback: press Escape
-            pyautogui.press("escape")
-            return True
-        
-        try:
-            location = pyautogui.locateOnScreen(
-                str(anchor),
-                confidence=0.8
-            )
-            if location:
-                center = pyautogui.center(location)
-                pyautogui.click(center.x, center.y)
-                return True
-        except Exception:
-            pass
-        
-        # Fallback
-        pyautogui.press("escape")
-        return True
+        return self._click_button(anchor, "escape")
+    
+    def capture_screenshot(self) -> bytes:
+        """Grab the screen as WebP bytes for an approval notification. Blocking."""
+        return grab_webp(SCREENSHOT_WEBP_QUALITY)
     
-    async def take_screenshot_and_notify(self):
-        """Take a screenshot and send to Discord for approval."""
+    async def take_screenshot_and_notify(self, image: Optional[bytes] = None):
+        """
+        Send a screenshot to Discord for approval.
+        
+        Args:
+            image: Screenshot from capture_screenshot(); taken here, off
+                the event loop, if omitted
+        """
         try:
-            channel = self.bot.get_channel(self.channel_id)
+            channel = getattr(self.bot, "_outbox_channel", None) or self.bot.get_channel(self.channel_id)
             if not channel:
                 return
             
-            # Take screenshot
-            screenshot = pyautogui.screenshot()
-            screenshot_path = ANCHORS_PATH.parent / "outbox" / f"approval_{datetime.now().strftime('%H%M%S')}.png"
-            screenshot.save(str(screenshot_path))
-            self.last_screenshot_path = screenshot_path
+            # Take screenshot (encoded in memory, off the event loop)
+            if image is None:
+                image = await asyncio.to_thread(self.capture_screenshot)
+            filename = f"approval_{datetime.now().strftime('%H%M%S')}.webp"
             
-            # Different messages for different dialog types
-            if self.dialog_type == 'cli_command':
-                title = "⚡ **CLI Command Execution Request!**"
-                description = "A terminal command is waiting for approval."
-            else:
-                title = "📁 **File Access Request!**"
-                description = "A file operation is waiting for approval."
+            # Different messages for different dialog types, with the
+            # screenshot shown inside the embed
+            embed = self._embeds.get(self.dialog_type, self._embeds['file_access']).copy()
+            embed.set_image(url=f"attachment://{filename}")
             
             await channel.send(
-                f"{title}\n"
-                f"{description} Reply with:\n"
-                "• `!approve` or `!yes` - to approve\n"
-                "• `!reject` or `!no` - to reject",
-                file=discord.File(screenshot_path)
+                embed=embed,
+                file=discord.File(io.BytesIO(image), filename=filename)
             )
             
             self.pending_approval = True
@@ -190,21 +354,18 @@ class CommandApprovalWatcher:
         if not self.pending_approval:
             return
         
+        # Finding the button grabs and matches the screen; keep that off
+        # the event loop, on the GUI executor so the click can't land in
+        # the middle of another input sequence (e.g. a paste)
+        loop = asyncio.get_running_loop()
         if approved:
-            self.click_approve()
+            await loop.run_in_executor(self.gui_executor, self.click_approve)
             print("[APPROVAL] Command approved via Discord")
         else:
-            self.click_reject()
+            await loop.run_in_executor(self.gui_executor, self.click_reject)
             print("[APPROVAL] Command rejected via Discord")
         
         self.pending_approval = False
-        
-        # Clean up screenshot
-        if self.last_screenshot_path and self.last_screenshot_path.exists():
-            try:
-                self.last_screenshot_path.unlink()
-            except:
-                pass
 
 
 def calibrate_file_access_dialog():
@@ -242,8 +403,8 @@ Press ENTER when you have a FILE ACCESS dialog visible...
     height = abs(bottom_right[1] - top_left[1])
     
     if width > 10 and height > 10:
-        screenshot = pyautogui.screenshot(region=(left, top, width, height))
-        screenshot.save(str(APPROVAL_DIALOG_ANCHOR))
+        screenshot = grab_region(left, top, width, height)
+        save_anchor(screenshot, APPROVAL_DIALOG_ANCHOR)
         print(f"✅ Saved: {APPROVAL_DIALOG_ANCHOR}")
     
     print("\n[Step 2/3] Capturing APPROVE BUTTON...")
@@ -252,8 +413,8 @@ Press ENTER when you have a FILE ACCESS dialog visible...
     btn_pos = pyautogui.position()
     
     # Capture small region around button
-    screenshot = pyautogui.screenshot(region=(btn_pos[0]-30, btn_pos[1]-10, 60, 20))
-    screenshot.save(str(APPROVE_BUTTON_ANCHOR))
+    screenshot = grab_region(btn_pos[0]-30, btn_pos[1]-10, 60, 20)
+    save_anchor(screenshot, APPROVE_BUTTON_ANCHOR)
     print(f"✅ Saved: {APPROVE_BUTTON_ANCHOR}")
     
     print("\n[Step 3/3] Capturing REJECT BUTTON...")
@@ -261,8 +422,8 @@ Press ENTER when you have a FILE ACCESS dialog visible...
     time.sleep(3)
     btn_pos = pyautogui.position()
     
-    screenshot = pyautogui.screenshot(region=(btn_pos[0]-30, btn_pos[1]-10, 60, 20))
-    screenshot.save(str(REJECT_BUTTON_ANCHOR))
+    screenshot = grab_region(btn_pos[0]-30, btn_pos[1]-10, 60, 20)
+    save_anchor(screenshot, REJECT_BUTTON_ANCHOR)
     print(f"✅ Saved: {REJECT_BUTTON_ANCHOR}")
     
     print("\n✅ File access calibration complete!")
@@ -309,8 +470,8 @@ Press ENTER when you have a CLI COMMAND dialog visible...
     height = abs(bottom_right[1] - top_left[1])
     
     if width > 10 and height > 10:
-        screenshot = pyautogui.screenshot(region=(left, top, width, height))
-        screenshot.save(str(CLI_COMMAND_ANCHOR))
+        screenshot = grab_region(left, top, width, height)
+        save_anchor(screenshot, CLI_COMMAND_ANCHOR)
         print(f"✅ Saved: {CLI_COMMAND_ANCHOR}")
     
     print("\n[Step 2/3] Capturing APPROVE BUTTON (Run Command)...")
@@ -318,8 +479,8 @@ Press ENTER when you have a CLI COMMAND dialog visible...
     time.sleep(3)
     btn_pos = pyautogui.position()
     
-    screenshot = pyautogui.screenshot(region=(btn_pos[0]-30, btn_pos[1]-10, 60, 20))
-    screenshot.save(str(CLI_APPROVE_BUTTON_ANCHOR))
+    screenshot = grab_region(btn_pos[0]-30, btn_pos[1]-10, 60, 20)
+    save_anchor(screenshot, CLI_APPROVE_BUTTON_ANCHOR)
     print(f"✅ Saved: {CLI_APPROVE_BUTTON_ANCHOR}")
     
     print("\n[Step 3/3] Capturing REJECT BUTTON (Cancel)...")
@@ -327,8 +488,8 @@ Press ENTER when you have a CLI COMMAND dialog visible...
     time.sleep(3)
     btn_pos = pyautogui.position()
     
-    screenshot = pyautogui.screenshot(region=(btn_pos[0]-30, btn_pos[1]-10, 60, 20))
-    screenshot.save(str(CLI_REJECT_BUTTON_ANCHOR))
+    screenshot = grab_region(btn_pos[0]-30, btn_pos[1]-10, 60, 20)
+    save_anchor(screenshot, CLI_REJECT_BUTTON_ANCHOR)
     print(f"✅ Saved: {CLI_REJECT_BUTTON_ANCHOR}")
     
     print("\n✅ CLI command calibration complete!")
@@ -13,6 +13,7 @@ Prerequisites:
     4. Download credentials.json to this directory
 """
 
+import functools
 import sys
 import os
 from pathlib import Path
@@ -21,7 +22,7 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-import pickle
+from googleapiclient.http import MediaFileUpload
 
 # Scopes required for creating Google Docs
 SCOPES = ['https://www.googleapis.com/auth/documents', 'https://www.googleapis.com/auth/drive.file']
@@ -29,17 +30,23 @@ SCOPES = ['https://www.googleapis.com/auth/documents', 'https://www.googleapis.c
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 CREDENTIALS_PATH = SCRIPT_DIR / "credentials.json"
-TOKEN_PATH = SCRIPT_DIR / "token.pickle"
+TOKEN_PATH = SCRIPT_DIR / "token.json"
 
+# Resumable upload chunk size (must be a multiple of 256 KB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
+
+@functools.lru_cache(maxsize=1)
 def get_authenticated_service():
-    """Authenticate and return the Google Docs service."""
+    """
+    Authenticate and return the Google Docs and Drive services.
+    Built once per process; the client library refreshes the token itself.
+    """
     creds = None
 
     # Load existing token
     if TOKEN_PATH.exists():
-        with open(TOKEN_PATH, 'rb') as token:
-            creds = pickle.load(token)
+        creds = Credentials.from_authorized_user_file(str(TOKEN_PATH), SCOPES)
 
     # Refresh or create new credentials
     if not creds or not creds.valid:
@@ -54,9 +61,10 @@ def get_authenticated_service():
             flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_PATH), SCOPES)
             creds = flow.run_local_server(port=0)
 
-        # Save token for future use
-        with open(TOKEN_PATH, 'wb') as token:
-            pickle.dump(creds, token)
+        # Save token for future use (atomically, so a crash can't truncate it)
+        tmp_path = TOKEN_PATH.with_suffix(".tmp")
+        tmp_path.write_text(creds.to_json(), encoding="utf-8")
+        os.replace(tmp_path, TOKEN_PATH)
 
     docs_service = build('docs', 'v1', credentials=creds)
     drive_service = build('drive', 'v3', credentials=creds)
@@ -78,28 +86,22 @@ def upload_to_docs(file_path: str, title: str = None) -> str:
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    # Read file content
-    content = path.read_text(encoding='utf-8')
-    
     if title is None:
         title = path.stem
 
-    docs_service, drive_service = get_authenticated_service()
-
-    # Create a new Google Doc
-    doc = docs_service.documents().create(body={'title': title}).execute()
-    doc_id = doc.get('documentId')
-
-    # Insert content into the document
-    requests = [
-        {
-            'insertText': {
-                'location': {'index': 1},
-                'text': content
-            }
-        }
-    ]
-    docs_service.documents().batchUpdate(documentId=doc_id, body={'requests': requests}).execute()
+    _, drive_service = get_authenticated_service()
+
+    # Let Drive convert the markdown into a Doc as it's uploaded: one
+    # resumable request, streamed from disk, and headings/lists/code keep
+    # their formatting instead of arriving as plain text
+    media = MediaFileUpload(str(path), mimetype='text/markdown',
+                            resumable=True, chunksize=UPLOAD_CHUNK_SIZE)
+    doc = drive_service.files().create(
+        body={'name': title, 'mimeType': 'application/vnd.google-apps.document'},
+        media_body=media,
+        fields='id'
+    ).execute()
+    doc_id = doc.get('id')
 
     # Generate URL
     doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
@@ -24,11 +24,17 @@ def inspect_window(title_pattern):
     print(f"Found window: {window.Name}")
     print("Inspecting UI hierarchy (this may take a moment)...")
 
-    # Walk the tree and print relevant text nodes
-    def walk(control, depth=0):
-        if depth > 10:  # Limit depth
-            return
-            
+    # Walk the tree and print relevant text nodes. Every property read is
+    # a COM round-trip, so the walk is iterative with a node budget, and
+    # off-screen containers are skipped without visiting their children.
+    max_depth = 10
+    max_nodes = 2000
+    stack = [(window, 0)]
+    visited = 0
+    while stack and visited < max_nodes:
+        control, depth = stack.pop()
+        visited += 1
+        
         try:
             name = control.Name
             control_type = control.ControlTypeName
@@ -38,12 +44,20 @@ def inspect_window(title_pattern):
             if name and len(name) > 1 and not name.isspace():
                 print(f"{indent}[{control_type}] {name[:100]}")
             
-            for child in control.GetChildren():
-                walk(child, depth + 1)
+            if depth >= max_depth:
+                continue
+            if control_type in ("PaneControl", "GroupControl") and control.IsOffscreen:
+                continue
+            
+            # Reversed so children pop off the stack in order
+            children = control.GetChildren()
+            stack.extend((child, depth + 1) for child in reversed(children))
         except Exception:
             pass
+    
+    if stack:
+        print(f"Stopped after {max_nodes} elements.")
 
-    walk(window)
 
 if __name__ == "__main__":
     target = "AntiGravity"  # Default title
@@ -0,0 +1,63 @@
+"""
+Match Kernel
+============
+Scores a template at one screen position: the TM_CCOEFF_NORMED value for
+a single patch. This is the recurring check for anchors that haven't
+moved (the response-complete icons are polled every couple of seconds
+while recording), so it is kept to a single pass over the patch.
+
+Uses a Numba-compiled loop when numba is installed, and NumPy otherwise.
+Templates must be pre-normalized: zero mean, unit L2 norm.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Optional dependency
+    njit = None
+
+
+def _ncc_numpy(patch: np.ndarray, t_norm: np.ndarray) -> float:
+    patch = patch.astype(np.float32)
+    patch -= patch.mean()
+    norm = np.linalg.norm(patch)
+    if norm < 1e-6:
+        return 0.0
+    return float(np.vdot(patch, t_norm) / norm)
+
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _ncc_numba(patch, t_norm):
+        # The template sums to zero, so sum(p * t) is already the
+        # mean-subtracted numerator; the patch variance comes from the
+        # running sums in the same pass
+        h, w = t_norm.shape
+        sum_p = 0.0
+        sum_p2 = 0.0
+        sum_pt = 0.0
+        for i in range(h):
+            for j in range(w):
+                p = float(patch[i, j])
+                sum_p += p
+                sum_p2 += p * p
+                sum_pt += p * t_norm[i, j]
+        var = sum_p2 - sum_p * sum_p / (h * w)
+        if var < 1e-6:
+            return 0.0
+        return sum_pt / np.sqrt(var)
+
+    # Compile now (or load from cache) for the strided uint8 views that
+    # slicing a screen produces, rather than on the first real check
+    _ncc_numba(np.zeros((4, 4), np.uint8)[:2, :2], np.zeros((2, 2), np.float32))
+
+
+def ncc(patch: np.ndarray, t_norm: np.ndarray) -> float:
+    """
+    Return the TM_CCOEFF_NORMED score of a uint8 patch against a
+    pre-normalized float32 template of the same shape.
+    """
+    if njit is not None:
+        return float(_ncc_numba(patch, t_norm))
+    return _ncc_numpy(patch, t_norm)
@@ -8,20 +8,38 @@ Creates lightweight videos for Discord sharing.
 import cv2
 import numpy as np
 import pyautogui
+import queue
 import threading
 import time
 from pathlib import Path
 from datetime import datetime
 
+from utils.anchor_match import grab_region
+from utils.video_encoder import VideoWriter
+
 
 class ScreenRecorder:
-    """Records a portion of the screen to a video file."""
+    """
+    Records a portion of the screen to a video file.
+    
+    Recordings run on one persistent worker thread fed by a job queue, so
+    starting a recording doesn't create a thread and the worker's mss
+    capture handle stays open between recordings.
+    """
     
     def __init__(self, output_dir: Path):
         self.output_dir = output_dir
         self.recording = False
         self.output_path = None
-        self.thread = None
+        
+        # Current job's stop request and completion signal
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+        
+        self._jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._worker, name="screen-recorder", daemon=True)
+        self.thread.start()
         
         # Recording settings
         self.fps = 10  # Lower FPS for smaller files
@@ -59,56 +77,78 @@ class ScreenRecorder:
         timestamp = datetime.now().strftime('%H%M%S')
         self.output_path = self.output_dir / f"recording_{timestamp}.mp4"
         
-        # Start recording in background thread
+        # Hand the job to the worker thread
         self.recording = True
-        self.thread = threading.Thread(target=self._record)
-        self.thread.start()
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._jobs.put((self.region, duration, self.output_path, self._stop, self._done))
         
         return self.output_path
     
     def stop_recording(self) -> Path:
-        """Stop recording and return the output file path."""
-        self.recording = False
-        if self.thread:
-            self.thread.join(timeout=5)
+        """
+        Ask the current recording to stop and return the output file path.
+        Doesn't block; call wait() before reading the file.
+        """
+        self._stop.set()
         return self.output_path
     
-    def _record(self):
+    @property
+    def stop_requested(self) -> bool:
+        """True if stop_recording() ended the current recording early."""
+        return self._stop.is_set()
+    
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Block until the current recording's file is finalized (including
+        ffmpeg's closing remux). Returns False if the timeout ran out first.
+        """
+        return self._done.wait(timeout)
+    
+    def _worker(self):
+        """Run queued recordings one at a time."""
+        while True:
+            region, duration, output_path, stop, done = self._jobs.get()
+            try:
+                self._record(region, duration, output_path, stop)
+            except Exception as e:
+                print(f"[RECORD] Recording failed: {e}")
+            finally:
+                self.recording = False
+                done.set()
+    
+    def _record(self, region: tuple, duration: int, output_path: Path, stop: threading.Event):
         """Internal recording loop."""
-        x, y, w, h = self.region
+        x, y, w, h = region
         
-        # Calculate output dimensions (scaled down)
-        out_w = int(w * self.scale)
-        out_h = int(h * self.scale)
+        # Calculate output dimensions (scaled down, even for H.264)
+        out_w = int(w * self.scale) // 2 * 2
+        out_h = int(h * self.scale) // 2 * 2
         
-        # Video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(
-            str(self.output_path),
-            fourcc,
-            self.fps,
-            (out_w, out_h)
-        )
+        # Video writer (hardware H.264 via ffmpeg when available); ffmpeg
+        # takes the BGRA grabs as-is and converts on its side
+        out = VideoWriter(output_path, self.fps, (out_w, out_h), pix_fmt="bgra")
         
         start_time = time.time()
         frame_interval = 1.0 / self.fps
         
+        # Scaled output frame, reused for every frame
+        frame_buf = np.empty((out_h, out_w, 4), dtype=np.uint8)
+        
         try:
-            while self.recording and (time.time() - start_time) < self.duration:
+            while not stop.is_set() and (time.time() - start_time) < duration:
                 frame_start = time.time()
                 
-                # Capture screen region
-                screenshot = pyautogui.screenshot(region=(x, y, w, h))
-                frame = np.array(screenshot)
-                
-                # Convert RGB to BGR for OpenCV
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                # Capture screen region (mss BGRA, wrapped without a copy)
+                frame = grab_region(x, y, w, h)
                 
-                # Resize for smaller file
-                frame = cv2.resize(frame, (out_w, out_h))
+                # Resize for smaller file. INTER_AREA averages each 2x2
+                # block at scale 0.5 (OpenCV has a SIMD path for that),
+                # where the default bilinear filter aliases small text.
+                cv2.resize(frame, (out_w, out_h), dst=frame_buf, interpolation=cv2.INTER_AREA)
                 
                 # Write frame
-                out.write(frame)
+                out.write(frame_buf)
                 
                 # Maintain FPS
                 elapsed = time.time() - frame_start
@@ -117,7 +157,6 @@ class ScreenRecorder:
                     
         finally:
             out.release()
-            self.recording = False
 
 
 # Global recorder instance
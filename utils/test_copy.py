@@ -7,6 +7,38 @@ from pathlib import Path
 # Load anchor
 ANCHOR = Path(__file__).parent.parent / "anchors" / "chat_input.png"
 
+# How long to wait for Ctrl+C to land on the clipboard
+COPY_TIMEOUT = 2.0
+
+# Fixed wait used instead when there is no clipboard sequence number
+COPY_PADDING = 0.5
+
+
+def clipboard_sequence():
+    """Return the Win32 clipboard sequence number, or None off Windows."""
+    try:
+        import ctypes
+        return ctypes.windll.user32.GetClipboardSequenceNumber()
+    except (AttributeError, OSError):
+        return None
+
+
+def wait_for_clipboard_change(before, timeout: float = COPY_TIMEOUT) -> bool:
+    """
+    Wait until the clipboard sequence number moves past `before`.
+    Without a sequence number, just sleep COPY_PADDING seconds and assume
+    the copy landed.
+    """
+    if before is None:
+        time.sleep(COPY_PADDING)
+        return True
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if clipboard_sequence() != before:
+            return True
+        time.sleep(0.01)
+    return False
+
 def test_copy():
     print("Locating chat input...")
     location = pyautogui.locateOnScreen(str(ANCHOR), confidence=0.7, grayscale=True)
@@ -31,8 +63,10 @@ def test_copy():
     time.sleep(0.5)
     
     print("Copying (Ctrl+C)...")
+    before = clipboard_sequence()
     pyautogui.hotkey("ctrl", "c")
-    time.sleep(0.5)
+    if not wait_for_clipboard_change(before):
+        print("Clipboard didn't change!")
     
     content = pyperclip.paste()
     print(f"\n--- CLIPBOARD CONTENT ({len(content)} chars) ---\n")
@@ -0,0 +1,158 @@
+"""
+Video Encoder
+=============
+Writes recorded frames through an ffmpeg pipe, preferring a hardware
+H.264 encoder (NVENC, QuickSync, VAAPI) so encoding doesn't compete
+with the Discord bot for CPU.
+
+Falls back to libx264, and to OpenCV's software mp4v writer when ffmpeg
+isn't installed. MJPEG can be requested instead of H.264: it is cheap to
+encode on CPU at the cost of larger files.
+"""
+
+import functools
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+# Hardware encoder bitrate. Half-scale screen recordings look fine at
+# 2 Mbit/s, and it keeps a minute of video near Discord's upload limit.
+HW_BITRATE = "2M"
+
+# Encoder-specific output options, in order of preference. Hardware
+# encoders don't use the CPU either way, so NVENC takes its balanced
+# preset for better quality per bit.
+ENCODER_ARGS = {
+    "h264_nvenc": ["-preset", "p4", "-b:v", HW_BITRATE, "-g", "60", "-pix_fmt", "yuv420p"],
+    "h264_qsv": ["-preset", "veryfast", "-b:v", HW_BITRATE, "-g", "60", "-pix_fmt", "nv12"],
+    "h264_vaapi": ["-vf", "format=nv12,hwupload", "-b:v", HW_BITRATE, "-g", "60"],
+    "libx264": ["-preset", "ultrafast", "-tune", "zerolatency", "-crf", "28", "-g", "60", "-pix_fmt", "yuv420p"],
+}
+
+# Intra-only JPEG frames; use an .avi container
+MJPEG_ARGS = ["-q:v", "5", "-pix_fmt", "yuvj420p"]
+
+# OpenCV fallback fourcc per codec choice
+CV_FOURCC = {"h264": "mp4v", "mp4v": "mp4v", "mjpeg": "MJPG"}
+
+# Options that must come before the input
+ENCODER_INPUT_ARGS = {
+    "h264_vaapi": ["-vaapi_device", "/dev/dri/renderD128"],
+}
+
+
+def _encoder_works(ffmpeg: str, encoder: str) -> bool:
+    """Encode one tiny frame to check the encoder has working hardware behind it."""
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error",
+           *ENCODER_INPUT_ARGS.get(encoder, []),
+           "-f", "lavfi", "-i", "color=black:s=256x256", "-frames:v", "1",
+           "-c:v", encoder, *ENCODER_ARGS[encoder], "-f", "null", "-"]
+    try:
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, timeout=10)
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def detect_encoder() -> Optional[str]:
+    """
+    Return the best working H.264 encoder, or None if ffmpeg isn't usable.
+    The probe runs once per process.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+
+    try:
+        listing = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=10
+        ).stdout
+    except Exception:
+        return None
+
+    for encoder in ENCODER_ARGS:
+        if f" {encoder} " in listing and _encoder_works(ffmpeg, encoder):
+            print(f"[INFO] Video encoder: {encoder}")
+            return encoder
+
+    return None
+
+
+class VideoWriter:
+    """
+    Drop-in replacement for cv2.VideoWriter that streams raw frames to
+    ffmpeg. Width and height must be even for H.264.
+    """
+
+    def __init__(self, output_path: Path, fps: float, size: tuple, pix_fmt: str = "bgr24",
+                 codec: str = "h264"):
+        """
+        Args:
+            codec: "h264" (best available H.264 encoder), "mjpeg", or
+                "mp4v" (always OpenCV's software writer)
+        """
+        self.output_path = output_path
+        if codec == "h264":
+            self.encoder = detect_encoder()
+        elif codec == "mjpeg" and shutil.which("ffmpeg"):
+            self.encoder = "mjpeg"
+        else:
+            self.encoder = None
+        self._proc = None
+        self._cv_writer = None
+
+        width, height = size
+        if self.encoder:
+            output_args = ENCODER_ARGS.get(self.encoder, MJPEG_ARGS)
+            if Path(output_path).suffix.lower() in (".mp4", ".mov"):
+                output_args = [*output_args, "-movflags", "+faststart"]
+            cmd = [
+                shutil.which("ffmpeg"), "-y", "-hide_banner", "-loglevel", "error",
+                *ENCODER_INPUT_ARGS.get(self.encoder, []),
+                "-f", "rawvideo", "-pix_fmt", pix_fmt,
+                "-s", f"{width}x{height}", "-r", str(fps), "-i", "pipe:0",
+                "-c:v", self.encoder, *output_args,
+                str(output_path),
+            ]
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                          stdout=subprocess.DEVNULL,
+                                          stderr=subprocess.DEVNULL)
+        else:
+            fourcc = cv2.VideoWriter_fourcc(*CV_FOURCC.get(codec, "mp4v"))
+            self._cv_writer = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
+
+    def write(self, frame: np.ndarray):
+        """Write one frame (BGR, or the pix_fmt given to the constructor)."""
+        if self._proc:
+            try:
+                self._proc.stdin.write(np.ascontiguousarray(frame).data)
+            except (BrokenPipeError, OSError):
+                pass
+        else:
+            if frame.shape[2] == 4:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+            self._cv_writer.write(frame)
+
+    def release(self):
+        """Flush and close the output file."""
+        if self._proc:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            try:
+                self._proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+            self._proc = None
+        elif self._cv_writer is not None:
+            self._cv_writer.release()
+            self._cv_writer = None
@@ -7,15 +7,30 @@ Usage:
     from utils.windows_control import open_antigravity, maximize_window, open_project
 """
 
+import functools
+import logging
 import os
+import shutil
+import stat
 import time
 import subprocess
 from pathlib import Path
 from typing import Optional
 
-import pyautogui
 import pygetwindow as gw
 
+try:
+    import pyperclip
+except ImportError:  # Fall back to typing paths key by key
+    pyperclip = None
+
+if os.name == "nt":
+    import ctypes
+    from ctypes import wintypes
+
+
+logger = logging.getLogger(__name__)
+
 
 # ----- Configuration -----
 # Common paths for AntiGravity IDE (adjust if needed)
@@ -25,31 +40,121 @@ ANTIGRAVITY_PATHS = [
     r"C:\Program Files (x86)\AntiGravity\AntiGravity.exe",
 ]
 
-# Expand environment variables
-ANTIGRAVITY_PATHS = [os.path.expandvars(p) for p in ANTIGRAVITY_PATHS]
+# Expand environment variables, normalize, and drop duplicates (keeping
+# order). Pure string work: existence is left to find_antigravity_exe's
+# directory scan, so importing this module touches no files.
+ANTIGRAVITY_PATHS = list(dict.fromkeys(
+    os.path.normcase(os.path.normpath(os.path.expandvars(p))) for p in ANTIGRAVITY_PATHS
+))
+
+# Launch the IDE detached from this console, without inheriting our
+# standard handles, so it outlives the bot and never flashes a console
+LAUNCH_FLAGS = subprocess.DETACHED_PROCESS if os.name == "nt" else 0
+PROBE_FLAGS = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+
+# Window enumeration is reused for this many seconds, so back-to-back
+# lookups enumerate once. Actions that change windows (launch, maximize,
+# minimize, restore, focus, open, close) drop it straight away.
+WINDOW_CACHE_TTL = 0.25
+
+# (lowercased title, window) pairs; titles are read once per enumeration
+# since each .title access is a GetWindowText call
+_window_cache = []
+_window_cache_time = None
+
+# Time for the target app to read the clipboard before it is restored
+PASTE_SETTLE = 0.1
+
+# Pause between the two keys of a Ctrl+K, Ctrl+O chord
+CHORD_DELAY = 0.05
 
+# Upper bounds for the open-folder steps; each returns as soon as the
+# window it waits for shows up
+ACTIVATE_TIMEOUT = 1.0
+FOLDER_DIALOG_TIMEOUT = 2.0
+PROJECT_OPEN_TIMEOUT = 5.0
+IDE_START_TIMEOUT = 15.0
+WINDOW_POLL_INTERVAL = 0.05
+FOLDER_DIALOG_TITLES = ("open folder", "select folder")
 
+
+@functools.lru_cache(maxsize=1)
 def find_antigravity_exe() -> Optional[str]:
-    """Find the AntiGravity executable on the system."""
+    """
+    Find the AntiGravity executable on the system.
+    The search runs once per process; call find_antigravity_exe.cache_clear()
+    to search again (e.g. after installing the IDE).
+    """
+    # List each candidate directory once and look the name up in memory;
+    # directories that don't exist are skipped after one failed open
+    listings = {}
     for path in ANTIGRAVITY_PATHS:
-        if os.path.exists(path):
-            return path
+        directory, name = os.path.split(path)
+        if directory not in listings:
+            try:
+                with os.scandir(directory) as it:
+                    listings[directory] = {entry.name.lower(): entry for entry in it}
+            except OSError:
+                listings[directory] = {}
+        entry = listings[directory].get(name.lower())
+        if entry is not None and entry.is_file():
+            return entry.path
+    
+    # PATH lookup in-process before spawning 'where'
+    exe = shutil.which("antigravity")
+    if exe:
+        return exe
     
-    # Try to find via 'where' command
+    # Try to find via 'where' command (without flashing a console window)
     try:
         result = subprocess.run(
             ["where", "antigravity"],
+            stdin=subprocess.DEVNULL,
             capture_output=True,
-            text=True
+            text=True,
+            creationflags=PROBE_FLAGS
         )
         if result.returncode == 0:
-            return result.stdout.strip().split('\n')[0]
+            # One match per line (CRLF-terminated); take the first regular file
+            for line in result.stdout.splitlines():
+                if os.path.isfile(line.strip()):
+                    return line.strip()
     except Exception:
         pass
     
     return None
 
 
+def _spawn_antigravity(project_path: Optional[str] = None) -> Optional[subprocess.Popen]:
+    """Start the IDE process without waiting for it. Returns None on failure."""
+    exe_path = find_antigravity_exe()
+    
+    if not exe_path:
+        logger.error("AntiGravity executable not found!")
+        return None
+    
+    try:
+        args = [exe_path, project_path] if project_path else [exe_path]
+        proc = subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            creationflags=LAUNCH_FLAGS
+        )
+        _invalidate_window_cache()
+        if project_path:
+            logger.info("Launching AntiGravity with project: %s", project_path)
+        else:
+            logger.info("Launching AntiGravity...")
+        
+        return proc
+    except Exception as e:
+        logger.error("Failed to launch AntiGravity: %s", e)
+        return None
+
+
 def open_antigravity(project_path: Optional[str] = None) -> bool:
     """
     Launch AntiGravity IDE, optionally opening a specific project folder.
@@ -60,26 +165,106 @@ def open_antigravity(project_path: Optional[str] = None) -> bool:
     Returns:
         True if launched successfully, False otherwise
     """
-    exe_path = find_antigravity_exe()
-    
-    if not exe_path:
-        print("[ERROR] AntiGravity executable not found!")
-        return False
-    
-    try:
+    # Already running: reuse it rather than starting a second instance
+    window = _find_window_cached("antigravity")
+    if window:
         if project_path:
-            # Open with specific project
-            subprocess.Popen([exe_path, project_path])
-            print(f"[INFO] Launching AntiGravity with project: {project_path}")
-        else:
-            # Just open the IDE
-            subprocess.Popen([exe_path])
-            print("[INFO] Launching AntiGravity...")
-        
+            return open_project(project_path)
+        try:
+            window.activate()
+        except Exception as e:
+            logger.error("Failed to focus AntiGravity: %s", e)
+            return False
+        _invalidate_window_cache()
+        logger.info("AntiGravity already running: %s", window.title)
         return True
-    except Exception as e:
-        print(f"[ERROR] Failed to launch AntiGravity: {e}")
-        return False
+    
+    return _spawn_antigravity(project_path) is not None
+
+
+def _iter_windows():
+    """
+    Yield visible top-level windows one at a time. On Windows only the
+    handles are enumerated up front; Window objects are created as the
+    caller consumes them, so a search that stops early (see
+    _find_window_cached) skips the rest.
+    """
+    if os.name != "nt":
+        yield from gw.getAllWindows()
+        return
+    
+    user32 = ctypes.windll.user32
+    
+    handles = []
+    enum_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)(
+        lambda hwnd, _: handles.append(hwnd) or True
+    )
+    user32.EnumWindows(enum_proc, 0)
+    for hwnd in handles:
+        if user32.IsWindowVisible(hwnd):
+            yield gw.Window(hwnd)
+
+
+def _scan_windows():
+    """
+    Yield (lowercased title, window) for every titled top-level window from
+    a fresh enumeration. Only a scan that runs to the end replaces the cache.
+    """
+    global _window_cache, _window_cache_time
+    now = time.monotonic()
+    windows = []
+    for win in _iter_windows():
+        title = win.title
+        if title:
+            entry = (title.lower(), win)
+            windows.append(entry)
+            yield entry
+    _window_cache = windows
+    _window_cache_time = now
+
+
+def _cache_is_fresh(max_age: float = WINDOW_CACHE_TTL) -> bool:
+    """Whether the cached window list is younger than max_age."""
+    return _window_cache_time is not None and time.monotonic() - _window_cache_time <= max_age
+
+
+def _get_windows(max_age: float = WINDOW_CACHE_TTL) -> list:
+    """
+    Return (lowercased title, window) for every titled top-level window,
+    re-enumerating if the list is older than max_age.
+    """
+    if not _cache_is_fresh(max_age):
+        for _ in _scan_windows():
+            pass
+    return _window_cache
+
+
+def _invalidate_window_cache():
+    """Force the next lookup to enumerate windows again."""
+    global _window_cache_time
+    _window_cache_time = None
+
+
+def _wait_for_window(predicate, timeout: float, interval: float = WINDOW_POLL_INTERVAL,
+                     abort=None) -> Optional[gw.Window]:
+    """
+    Poll fresh window lists until predicate(title, window) holds, where
+    title is lowercased. Returns the window, or None on timeout or as soon
+    as the optional abort() returns True.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if abort is not None and abort():
+            return None
+        for title, win in _get_windows(max_age=0):
+            try:
+                if predicate(title, win):
+                    return win
+            except Exception:
+                pass
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(interval)
 
 
 def find_window(title_pattern: str) -> Optional[gw.Window]:
@@ -92,13 +277,38 @@ def find_window(title_pattern: str) -> Optional[gw.Window]:
     Returns:
         Window object if found, None otherwise
     """
-    windows = gw.getAllWindows()
-    for win in windows:
-        if title_pattern.lower() in win.title.lower():
+    return _find_window_cached(title_pattern.lower())
+
+
+def _find_window_cached(pattern: str) -> Optional[gw.Window]:
+    """
+    find_window() for an already lowercased pattern. With a stale cache the
+    windows are scanned lazily, stopping at the first match.
+    """
+    for title, win in (_window_cache if _cache_is_fresh() else _scan_windows()):
+        if pattern in title:
             return win
     return None
 
 
+def _is_foreground(window: gw.Window) -> bool:
+    """Whether the window already has the foreground (always False off Windows)."""
+    if os.name != "nt":
+        return False
+    return ctypes.windll.user32.GetForegroundWindow() == window._hWnd
+
+
+def _activate_and(window: gw.Window, op):
+    """
+    Run op(window) (e.g. maximize or restore), then activate the window
+    only if that didn't already bring it to the foreground.
+    """
+    op(window)
+    if not _is_foreground(window):
+        window.activate()
+    _invalidate_window_cache()
+
+
 def maximize_window(title_pattern: str = "AntiGravity") -> bool:
     """
     Find and maximize a window by title.
@@ -109,75 +319,100 @@ def maximize_window(title_pattern: str = "AntiGravity") -> bool:
     Returns:
         True if successful, False otherwise
     """
-    window = find_window(title_pattern)
+    window = _find_window_cached(title_pattern.lower())
     
     if not window:
-        print(f"[ERROR] Window '{title_pattern}' not found!")
+        logger.error("Window '%s' not found!", title_pattern)
         return False
     
     try:
-        window.maximize()
-        window.activate()
-        print(f"[INFO] Maximized window: {window.title}")
+        _activate_and(window, lambda w: w.maximize())
+        logger.info("Maximized window: %s", window.title)
         return True
     except Exception as e:
-        print(f"[ERROR] Failed to maximize: {e}")
+        logger.error("Failed to maximize: %s", e)
         return False
 
 
 def minimize_window(title_pattern: str = "AntiGravity") -> bool:
     """Minimize a window by title."""
-    window = find_window(title_pattern)
+    window = _find_window_cached(title_pattern.lower())
     
     if not window:
-        print(f"[ERROR] Window '{title_pattern}' not found!")
+        logger.error("Window '%s' not found!", title_pattern)
         return False
     
     try:
         window.minimize()
-        print(f"[INFO] Minimized window: {window.title}")
+        _invalidate_window_cache()
+        logger.info("Minimized window: %s", window.title)
         return True
     except Exception as e:
-        print(f"[ERROR] Failed to minimize: {e}")
+        logger.error("Failed to minimize: %s", e)
         return False
 
 
 def restore_window(title_pattern: str = "AntiGravity") -> bool:
     """Restore a minimized window."""
-    window = find_window(title_pattern)
+    window = _find_window_cached(title_pattern.lower())
     
     if not window:
-        print(f"[ERROR] Window '{title_pattern}' not found!")
+        logger.error("Window '%s' not found!", title_pattern)
         return False
     
     try:
-        window.restore()
-        window.activate()
-        print(f"[INFO] Restored window: {window.title}")
+        _activate_and(window, lambda w: w.restore())
+        logger.info("Restored window: %s", window.title)
         return True
     except Exception as e:
-        print(f"[ERROR] Failed to restore: {e}")
+        logger.error("Failed to restore: %s", e)
         return False
 
 
 def focus_window(title_pattern: str = "AntiGravity") -> bool:
     """Bring a window to the foreground."""
-    window = find_window(title_pattern)
+    window = _find_window_cached(title_pattern.lower())
     
     if not window:
-        print(f"[ERROR] Window '{title_pattern}' not found!")
+        logger.error("Window '%s' not found!", title_pattern)
         return False
     
     try:
         window.activate()
-        print(f"[INFO] Focused window: {window.title}")
+        _invalidate_window_cache()
+        logger.info("Focused window: %s", window.title)
         return True
     except Exception as e:
-        print(f"[ERROR] Failed to focus: {e}")
+        logger.error("Failed to focus: %s", e)
         return False
 
 
-def open_project(project_path: str) -> bool:
+def _paste_text(text: str) -> bool:
+    """
+    Enter text into the focused field with one Ctrl+V, restoring the
+    previous clipboard afterwards. Returns False if the clipboard isn't
+    usable.
+    """
+    if pyperclip is None:
+        return False
+    import pyautogui
+    
+    try:
+        previous = pyperclip.paste()
+        pyperclip.copy(text)
+    except Exception:
+        return False
+    
+    pyautogui.hotkey("ctrl", "v")
+    time.sleep(PASTE_SETTLE)
+    try:
+        pyperclip.copy(previous)
+    except Exception:
+        pass
+    return True
+
+
+def open_project(project_path: str, use_clipboard: bool = True) -> bool:
     """
     Open a project folder in AntiGravity.
     If IDE is already running, uses keyboard shortcut.
@@ -185,118 +420,222 @@ def open_project(project_path: str) -> bool:
     
     Args:
         project_path: Absolute path to the project folder
+        use_clipboard: Paste the path in one go; if False (or the
+            clipboard isn't usable) it is typed key by key instead
         
     Returns:
         True if successful, False otherwise
     """
-    path = Path(project_path)
-    if not path.exists():
-        print(f"[ERROR] Project path does not exist: {project_path}")
+    # Imported here rather than at the top: pyautogui pulls in PIL and
+    # more, and the window listing/finding commands don't need it
+    import pyautogui
+    
+    try:
+        st = os.stat(project_path)
+    except OSError:
+        logger.error("Project path does not exist: %s", project_path)
+        return False
+    if not stat.S_ISDIR(st.st_mode):
+        logger.error("Project path is not a folder: %s", project_path)
         return False
+    path = Path(os.path.abspath(project_path))
     
     # Check if AntiGravity is already running
-    window = find_window("AntiGravity")
+    window = _find_window_cached("antigravity")
     
     if window:
         # IDE is running - use Ctrl+O to open folder
         try:
             window.activate()
-            time.sleep(0.5)
+            _wait_for_window(lambda title, w: w == window and w.isActive, ACTIVATE_TIMEOUT)
             
-            # Ctrl+K, Ctrl+O is common for "Open Folder" in VS Code-like IDEs
-            pyautogui.hotkey("ctrl", "k")
-            time.sleep(0.2)
-            pyautogui.hotkey("ctrl", "o")
-            time.sleep(1)
+            # Ctrl+K, Ctrl+O is common for "Open Folder" in VS Code-like IDEs.
+            # Hold Ctrl through both keys, as a user types the chord.
+            pyautogui.keyDown("ctrl")
+            try:
+                pyautogui.press("k")
+                time.sleep(CHORD_DELAY)
+                pyautogui.press("o")
+            finally:
+                pyautogui.keyUp("ctrl")
             
-            # Type the path
-            pyautogui.typewrite(str(path), interval=0.02)
-            time.sleep(0.3)
+            # Wait for the folder picker rather than a fixed delay
+            dialog = _wait_for_window(
+                lambda title, w: any(t in title for t in FOLDER_DIALOG_TITLES),
+                FOLDER_DIALOG_TIMEOUT
+            )
+            if not dialog:
+                logger.info("Folder dialog not detected, entering path anyway")
+            
+            # Enter the path
+            if not (use_clipboard and _paste_text(str(path))):
+                pyautogui.typewrite(str(path), interval=0.02)
             
             # Press Enter to confirm
             pyautogui.press("enter")
+            _invalidate_window_cache()
             
-            print(f"[INFO] Opening project in running IDE: {project_path}")
+            # The IDE retitles its window once the folder is open
+            name = path.name.lower()
+            opened = _wait_for_window(
+                lambda title, w: name in title and "antigravity" in title,
+                PROJECT_OPEN_TIMEOUT
+            )
+            if opened:
+                logger.info("Opened project in running IDE: %s", project_path)
+            else:
+                logger.info("Opening project in running IDE: %s", project_path)
             return True
         except Exception as e:
-            print(f"[ERROR] Failed to open project: {e}")
+            logger.error("Failed to open project: %s", e)
             return False
     else:
-        # IDE not running - launch with project
-        return open_antigravity(str(path))
+        # IDE not running - launch with project, and watch for its window
+        # while the process starts up
+        proc = _spawn_antigravity(str(path))
+        if proc is None:
+            return False
+        
+        # The launcher may hand off to another process and exit 0; only a
+        # failing exit code means the launch went wrong
+        window = _wait_for_window(lambda title, w: "antigravity" in title,
+                                  IDE_START_TIMEOUT, abort=lambda: bool(proc.poll()))
+        if proc.returncode:
+            logger.error("AntiGravity exited with code %s", proc.returncode)
+            return False
+        
+        if window:
+            try:
+                window.maximize()
+            except Exception:
+                pass
+            _invalidate_window_cache()
+        return True
+
+
+# WINDOWPLACEMENT.showCmd values (winuser.h)
+SW_SHOWMINIMIZED = 2
+SW_SHOWMAXIMIZED = 3
+
+if os.name == "nt":
+    class WINDOWPLACEMENT(ctypes.Structure):
+        _fields_ = [
+            ("length", wintypes.UINT),
+            ("flags", wintypes.UINT),
+            ("showCmd", wintypes.UINT),
+            ("ptMinPosition", wintypes.POINT),
+            ("ptMaxPosition", wintypes.POINT),
+            ("rcNormalPosition", wintypes.RECT),
+        ]
+
+
+def _get_window_state(window: gw.Window) -> tuple:
+    """
+    Return (is_maximized, is_minimized). On Windows both come from one
+    GetWindowPlacement call instead of separate IsZoomed/IsIconic calls.
+    """
+    if os.name != "nt":
+        return window.isMaximized, window.isMinimized
+    
+    placement = WINDOWPLACEMENT()
+    placement.length = ctypes.sizeof(WINDOWPLACEMENT)
+    if not ctypes.windll.user32.GetWindowPlacement(window._hWnd, ctypes.byref(placement)):
+        return window.isMaximized, window.isMinimized
+    return placement.showCmd == SW_SHOWMAXIMIZED, placement.showCmd == SW_SHOWMINIMIZED
 
 
 def list_open_windows() -> list:
     """List all visible windows with their titles."""
-    windows = gw.getAllWindows()
-    visible = [w for w in windows if w.visible and w.title.strip()]
-    return [(w.title, w.isMaximized, w.isMinimized) for w in visible]
+    # One pass, reading each Win32-backed property at most once per window
+    result = []
+    for w in _iter_windows():
+        title = w.title
+        if not title.strip() or not w.visible:
+            continue
+        result.append((title, *_get_window_state(w)))
+    return result
 
 
 def close_window(title_pattern: str) -> bool:
     """Close a window by title (use with caution!)."""
-    window = find_window(title_pattern)
+    window = _find_window_cached(title_pattern.lower())
     
     if not window:
-        print(f"[ERROR] Window '{title_pattern}' not found!")
+        logger.error("Window '%s' not found!", title_pattern)
         return False
     
     try:
         window.close()
-        print(f"[INFO] Closed window: {window.title}")
+        _invalidate_window_cache()
+        logger.info("Closed window: %s", window.title)
         return True
     except Exception as e:
-        print(f"[ERROR] Failed to close: {e}")
+        logger.error("Failed to close: %s", e)
         return False
 
 
 # ----- CLI Interface -----
-if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("""
+CLI_HELP = """
 Windows Control Module
 ======================
 
 Commands:
-    python windows_control.py open [project_path]  - Open AntiGravity (optionally with project)
-    python windows_control.py max [window_title]   - Maximize a window
-    python windows_control.py min [window_title]   - Minimize a window
-    python windows_control.py focus [window_title] - Focus a window
-    python windows_control.py list                 - List all open windows
-    python windows_control.py project <path>       - Open a project in AntiGravity
-""")
+    python windows_control.py open [project_path]     - Open AntiGravity (optionally with project)
+    python windows_control.py max [window_title]      - Maximize a window
+    python windows_control.py min [window_title]      - Minimize a window
+    python windows_control.py focus [window_title]    - Focus a window
+    python windows_control.py restore [window_title]  - Restore a minimized window
+    python windows_control.py list                    - List all open windows
+    python windows_control.py project <path>          - Open a project in AntiGravity
+    python windows_control.py close <window_title>    - Close a window
+"""
+
+
+def _cli_list(arg: Optional[str]) -> bool:
+    windows = list_open_windows()
+    print("\nOpen Windows:")
+    for title, is_max, is_min in windows:
+        state = "MAX" if is_max else ("MIN" if is_min else "")
+        print(f"  [{state:3}] {title[:60]}")
+    return True
+
+
+def _cli_requires(usage: str, func):
+    """Wrap a command that needs an argument, printing usage without one."""
+    def run(arg: Optional[str]) -> bool:
+        if not arg:
+            print(f"Usage: python windows_control.py {usage}")
+            return False
+        return func(arg)
+    return run
+
+
+CLI_COMMANDS = {
+    "open": open_antigravity,
+    "max": lambda arg: maximize_window(arg or "AntiGravity"),
+    "min": lambda arg: minimize_window(arg or "AntiGravity"),
+    "focus": lambda arg: focus_window(arg or "AntiGravity"),
+    "restore": lambda arg: restore_window(arg or "AntiGravity"),
+    "list": _cli_list,
+    "project": _cli_requires("project <path>", open_project),
+    "close": _cli_requires("close <window_title>", close_window),
+}
+
+
+if __name__ == "__main__":
+    import sys
+    
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+    
+    if len(sys.argv) < 2:
+        print(CLI_HELP)
         sys.exit(0)
     
     command = sys.argv[1].lower()
     arg = sys.argv[2] if len(sys.argv) > 2 else None
     
-    if command == "open":
-        open_antigravity(arg)
-    elif command == "max":
-        maximize_window(arg or "AntiGravity")
-    elif command == "min":
-        minimize_window(arg or "AntiGravity")
-    elif command == "focus":
-        focus_window(arg or "AntiGravity")
-    elif command == "restore":
-        restore_window(arg or "AntiGravity")
-    elif command == "list":
-        windows = list_open_windows()
-        print("\nOpen Windows:")
-        for title, is_max, is_min in windows:
-            state = "MAX" if is_max else ("MIN" if is_min else "")
-            print(f"  [{state:3}] {title[:60]}")
-    elif command == "project":
-        if not arg:
-            print("Usage: python windows_control.py project <path>")
-        else:
-            open_project(arg)
-    elif command == "close":
-        if not arg:
-            print("Usage: python windows_control.py close <window_title>")
-        else:
-            close_window(arg)
-    else:
+    handler = CLI_COMMANDS.get(command)
+    if handler is None:
         print(f"Unknown command: {command}")
+        sys.exit(1)
+    sys.exit(0 if handler(arg) else 1)